@@ -0,0 +1,406 @@
+# async_cloud.py
+import re
+import json
+import uuid
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from cloud_sync import CloudProvider, DRIVE_BATCH_SIZE, GOOGLE_LIBS_HINT, load_google_credentials
+
+# Tente importar o aiohttp; se falhar, apenas os provedores síncronos estarão disponíveis.
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+DRIVE_FILES_URL = "https://www.googleapis.com/drive/v3/files"
+DRIVE_UPLOAD_URL = "https://www.googleapis.com/upload/drive/v3/files"
+DRIVE_BATCH_URL = "https://www.googleapis.com/batch/drive/v3"
+DRIVE_FOLDER_MIME = "application/vnd.google-apps.folder"
+# O upload retomável do Drive exige partes múltiplas de 256 KiB
+DRIVE_CHUNK_ALIGNMENT = 256 * 1024
+# Respostas que indicam falha temporária e justificam uma nova tentativa
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class DriveAPIError(Exception):
+    """Resposta inesperada da API REST do Google Drive."""
+
+
+def _parse_batch_statuses(content_type, text):
+    """Retorna {Content-ID da requisição: status HTTP} a partir da resposta multipart de um lote do Drive."""
+    boundary = re.search(r'boundary="?([^";]+)"?', content_type)
+    statuses = {}
+    for part in text.split(f"--{boundary.group(1)}") if boundary else []:
+        content_id = re.search(r"^Content-ID:\s*<response-([^>]+)>", part, re.I | re.M)
+        status = re.search(r"^HTTP/[\d.]+\s+(\d{3})", part, re.M)
+        if content_id and status:
+            statuses[content_id.group(1)] = int(status.group(1))
+    return statuses
+
+
+class AsyncCloudProvider(ABC):
+    """
+    Interface assíncrona para provedores de armazenamento em nuvem.
+
+    As operações rodam em um único event loop e podem ser executadas
+    concorrentemente; cada implementação limita quantas requisições ficam em
+    andamento ao mesmo tempo. Para os chamadores síncronos existentes, use
+    `SyncProviderAdapter`.
+    """
+    @abstractmethod
+    async def upload_file(self, local_path: Path, remote_path: str) -> bool:
+        """Faz upload de um arquivo para a nuvem."""
+        pass
+
+    @abstractmethod
+    async def list_files(self, remote_directory: str) -> list:
+        """Lista arquivos em um diretório remoto como dicionários com ao menos 'name' e 'size'."""
+        pass
+
+    @abstractmethod
+    async def delete_file(self, remote_path: str) -> bool:
+        """Exclui um arquivo remoto."""
+        pass
+
+    async def delete_files(self, remote_paths: list) -> int:
+        """Exclui vários arquivos remotos concorrentemente e retorna quantos foram excluídos."""
+        results = await asyncio.gather(*(self.delete_file(remote_path) for remote_path in remote_paths))
+        return sum(1 for deleted in results if deleted)
+
+    async def delete_listed(self, remote_directory: str, listed_files: list) -> int:
+        """Exclui arquivos obtidos de `list_files(remote_directory)`; veja `CloudProvider.delete_listed`."""
+        return await self.delete_files([f"{remote_directory}/{f['name']}" for f in listed_files])
+
+    async def close(self):
+        """Libera conexões e outros recursos do provedor."""
+        pass
+
+
+class SyncProviderAdapter(CloudProvider):
+    """
+    Expõe um AsyncCloudProvider pela interface síncrona `CloudProvider`.
+
+    O provedor roda em um event loop próprio, em uma thread dedicada. Cada chamada
+    síncrona agenda a corrotina nesse loop e aguarda o resultado, de modo que
+    chamadas feitas a partir de várias threads são executadas concorrentemente
+    sobre o mesmo pool de conexões.
+    """
+    concurrent_safe = True
+
+    def __init__(self, async_provider: AsyncCloudProvider):
+        self.async_provider = async_provider
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True, name="cloud-io")
+        self._thread.start()
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def upload_file(self, local_path: Path, remote_path: str) -> bool:
+        return self._run(self.async_provider.upload_file(local_path, remote_path))
+
+    def list_files(self, remote_directory: str) -> list:
+        return self._run(self.async_provider.list_files(remote_directory))
+
+    def delete_file(self, remote_path: str) -> bool:
+        return self._run(self.async_provider.delete_file(remote_path))
+
+    def delete_files(self, remote_paths: list) -> int:
+        return self._run(self.async_provider.delete_files(remote_paths))
+
+    def delete_listed(self, remote_directory: str, listed_files: list) -> int:
+        return self._run(self.async_provider.delete_listed(remote_directory, listed_files))
+
+    def close(self):
+        """Fecha o provedor e encerra o event loop."""
+        if self._loop.is_closed():
+            return
+        self._run(self.async_provider.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+class AsyncGoogleDriveProvider(AsyncCloudProvider):
+    """
+    Google Drive pela API REST v3, com uma única sessão HTTP (keep-alive) compartilhada.
+
+    Diferente do `GoogleDriveProvider`, que bloqueia uma thread por chamada do
+    googleapiclient, aqui uploads, listagens e exclusões são requisições
+    concorrentes sobre o mesmo pool de conexões, limitadas por
+    `performance.max_concurrent_requests`. As exclusões usam o endpoint de lote
+    do Drive, com até 100 arquivos por requisição.
+    """
+    def __init__(self, config):
+        if not AIOHTTP_AVAILABLE:
+            raise ImportError("Biblioteca aiohttp não instalada. Execute 'pip install aiohttp'")
+        try:
+            from google.auth.transport.requests import Request
+        except ImportError:
+            raise ImportError(GOOGLE_LIBS_HINT)
+        self._request_class = Request
+
+        self.logger = logging.getLogger(__name__)
+        performance = config.get("performance", {})
+        self.max_requests = max(1, int(performance.get("max_concurrent_requests", 16)))
+        self.retry_attempts = max(1, int(performance.get("retry_attempts", 3)))
+        self.timeout_seconds = performance.get("timeout_seconds", 300)
+        chunk_size = int(performance.get("chunk_size_mb", 10)) * 1024 * 1024
+        self.chunk_size = max(DRIVE_CHUNK_ALIGNMENT, chunk_size - chunk_size % DRIVE_CHUNK_ALIGNMENT)
+
+        self.creds = load_google_credentials(config.get("cloud_credentials", {}).get("google_drive", {}), self.logger)
+        self._session = None
+        self._semaphore = asyncio.Semaphore(self.max_requests)
+        self._refresh_lock = asyncio.Lock()
+        self._folder_ids = {}
+        self._folder_locks = {}
+
+    async def _get_session(self):
+        # Criada no primeiro uso, já dentro do event loop em que será usada
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_requests, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds),
+            )
+        return self._session
+
+    async def _refresh_credentials(self, force=False):
+        """Renova o token de acesso (em uma thread, pois a renovação do google-auth é bloqueante)."""
+        async with self._refresh_lock:
+            if force or not self.creds.valid:
+                await asyncio.get_running_loop().run_in_executor(None, self.creds.refresh, self._request_class())
+
+    async def _request(self, method, url, expected=(200,), headers=None, raw=False, **kwargs):
+        """
+        Executa uma requisição autenticada e retorna (status, cabeçalhos, corpo JSON),
+        ou o corpo em texto, se `raw` for verdadeiro.
+
+        Renova o token após um 401 e repete falhas temporárias (429/5xx) com espera
+        exponencial, até `performance.retry_attempts` tentativas.
+        """
+        session = await self._get_session()
+        for attempt in range(self.retry_attempts):
+            await self._refresh_credentials()
+            request_headers = {**(headers or {}), "Authorization": f"Bearer {self.creds.token}"}
+            async with self._semaphore:
+                async with session.request(method, url, headers=request_headers, **kwargs) as response:
+                    text = await response.text()
+                    status, response_headers = response.status, response.headers
+            if status in expected:
+                if raw:
+                    return status, response_headers, text
+                return status, response_headers, json.loads(text) if text else None
+
+            last_attempt = attempt == self.retry_attempts - 1
+            if status == 401 and not last_attempt:
+                await self._refresh_credentials(force=True)
+            elif status in RETRYABLE_STATUSES and not last_attempt:
+                await asyncio.sleep(2 ** attempt)
+            else:
+                raise DriveAPIError(f"{method} {url}: HTTP {status}: {text[:200]}")
+
+    @staticmethod
+    def _quote(value):
+        return value.replace("\\", "\\\\").replace("'", "\\'")
+
+    async def _get_or_create_folder_id(self, remote_path: str, create: bool = True) -> str:
+        """
+        Obtém o ID de uma pasta, criando-a se não existir (ou retornando None, se `create` for False).
+
+        Cada nível intermediário também fica em cache, e uma trava por caminho
+        impede que uploads concorrentes criem a mesma pasta duas vezes.
+        """
+        parent_id = 'root'
+        prefix = Path('/')
+        # A raiz ('/') não é uma pasta no Drive; apenas os componentes abaixo dela são resolvidos
+        for component in (c for c in Path(remote_path).parts if c not in ('/', '\\')):
+            prefix = prefix / component
+            key = str(prefix)
+            if key in self._folder_ids:
+                parent_id = self._folder_ids[key]
+                continue
+
+            lock = self._folder_locks.setdefault(key, asyncio.Lock())
+            async with lock:
+                if key not in self._folder_ids:
+                    query = (f"name='{self._quote(component)}' and mimeType='{DRIVE_FOLDER_MIME}' "
+                             f"and '{parent_id}' in parents and trashed=false")
+                    _, _, response = await self._request("GET", DRIVE_FILES_URL, params={"q": query, "fields": "files(id)"})
+                    files = response.get('files', [])
+                    if files:
+                        self._folder_ids[key] = files[0]['id']
+                    elif not create:
+                        return None
+                    else:
+                        _, _, folder = await self._request(
+                            "POST", DRIVE_FILES_URL, params={"fields": "id"},
+                            json={"name": component, "mimeType": DRIVE_FOLDER_MIME, "parents": [parent_id]},
+                        )
+                        self._folder_ids[key] = folder['id']
+            parent_id = self._folder_ids[key]
+        return parent_id
+
+    async def upload_file(self, local_path: Path, remote_path: str) -> bool:
+        """Envia o arquivo por upload retomável, em partes de `performance.chunk_size_mb`."""
+        if not self.creds:
+            self.logger.error("Autenticação com o Google Drive falhou. Não é possível fazer o upload.")
+            return False
+
+        try:
+            remote_dir = str(Path(remote_path).parent)
+            folder_id = await self._get_or_create_folder_id(remote_dir)
+            if not folder_id:
+                self.logger.error(f"Não foi possível encontrar ou criar a pasta remota: {remote_dir}")
+                return False
+
+            size = local_path.stat().st_size
+            _, headers, _ = await self._request(
+                "POST", DRIVE_UPLOAD_URL, params={"uploadType": "resumable"},
+                json={"name": local_path.name, "parents": [folder_id]},
+                headers={"X-Upload-Content-Type": "application/octet-stream", "X-Upload-Content-Length": str(size)},
+            )
+            session_url = headers["Location"]
+
+            loop = asyncio.get_running_loop()
+            offset = 0
+            with local_path.open('rb') as f:
+                while True:
+                    # A leitura do disco roda fora do loop para não atrasar as outras requisições
+                    chunk = await loop.run_in_executor(None, f.read, self.chunk_size)
+                    content_range = f"bytes {offset}-{offset + len(chunk) - 1}/{size}" if chunk else f"bytes */{size}"
+                    status, _, _ = await self._request(
+                        "PUT", session_url, expected=(200, 201, 308), data=chunk,
+                        headers={"Content-Range": content_range},
+                    )
+                    offset += len(chunk)
+                    if status != 308:
+                        break
+
+            self.logger.info(f"Upload para o Google Drive bem-sucedido: {local_path.name}")
+            return True
+        except (DriveAPIError, aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+            self.logger.error(f"Erro durante o upload para o Google Drive: {e}", exc_info=True)
+            return False
+
+    async def _list_folder(self, folder_id):
+        files = []
+        page_token = None
+        while True:
+            params = {
+                "q": f"'{folder_id}' in parents and trashed=false",
+                "fields": "nextPageToken, files(id, name, size, md5Checksum, modifiedTime)",
+                "pageSize": "1000",
+            }
+            if page_token:
+                params["pageToken"] = page_token
+            _, _, response = await self._request("GET", DRIVE_FILES_URL, params=params)
+            for item in response.get('files', []):
+                item['size'] = int(item.get('size', 0))
+                files.append(item)
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return files
+
+    async def list_files(self, remote_directory: str) -> list:
+        if not self.creds:
+            self.logger.error("Autenticação com o Google Drive falhou. Não é possível listar arquivos.")
+            return []
+
+        try:
+            folder_id = await self._get_or_create_folder_id(remote_directory, create=False)
+            if not folder_id:
+                return []
+            return await self._list_folder(folder_id)
+        except (DriveAPIError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.logger.error(f"Erro ao listar arquivos no Google Drive: {e}", exc_info=True)
+            return []
+
+    async def _delete_batch(self, file_ids):
+        """
+        Envia uma requisição em lote (multipart/mixed) com uma exclusão por arquivo.
+        Retorna (quantos foram excluídos, IDs com falha temporária a tentar de novo).
+        """
+        boundary = f"batch_{uuid.uuid4().hex}"
+        body = "".join(
+            f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <{file_id}>\r\n\r\n"
+            f"DELETE /drive/v3/files/{file_id} HTTP/1.1\r\n\r\n"
+            for file_id in file_ids
+        ) + f"--{boundary}--\r\n"
+        try:
+            _, headers, text = await self._request(
+                "POST", DRIVE_BATCH_URL, data=body.encode('utf-8'), raw=True,
+                headers={"Content-Type": f"multipart/mixed; boundary={boundary}"},
+            )
+        except (DriveAPIError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.logger.error(f"Erro ao executar exclusão em lote no Google Drive: {e}")
+            return 0, []
+
+        statuses = _parse_batch_statuses(headers.get("Content-Type", ""), text)
+        deleted, retry = 0, []
+        for file_id in file_ids:
+            status = statuses.get(file_id)
+            if status in (200, 204):
+                deleted += 1
+            elif status in RETRYABLE_STATUSES:
+                retry.append(file_id)
+            else:
+                self.logger.error(f"Erro ao excluir o arquivo {file_id} do Google Drive: HTTP {status}")
+        return deleted, retry
+
+    async def _delete_ids(self, file_ids):
+        """
+        Exclui arquivos pelo ID usando o endpoint de lote do Drive, com até
+        `DRIVE_BATCH_SIZE` exclusões por requisição. Exclusões recusadas por limite
+        de taxa ou erro temporário são reenviadas, com espera exponencial.
+        """
+        deleted = 0
+        for attempt in range(self.retry_attempts):
+            batches = [file_ids[i:i + DRIVE_BATCH_SIZE] for i in range(0, len(file_ids), DRIVE_BATCH_SIZE)]
+            results = await asyncio.gather(*(self._delete_batch(batch) for batch in batches))
+            deleted += sum(count for count, _ in results)
+            file_ids = [file_id for _, retry in results for file_id in retry]
+            if not file_ids:
+                break
+            if attempt < self.retry_attempts - 1:
+                await asyncio.sleep(2 ** attempt)
+        if file_ids:
+            self.logger.error(f"{len(file_ids)} arquivo(s) não foram excluídos do Google Drive após "
+                              f"{self.retry_attempts} tentativas.")
+        return deleted
+
+    async def delete_file(self, remote_path: str) -> bool:
+        return await self.delete_files([remote_path]) == 1
+
+    async def delete_files(self, remote_paths: list) -> int:
+        """Exclui arquivos em lotes, resolvendo os IDs com uma única listagem por diretório."""
+        if not self.creds:
+            self.logger.error("Autenticação com o Google Drive falhou. Não é possível excluir arquivos.")
+            return 0
+
+        paths_by_dir = {}
+        for remote_path in remote_paths:
+            paths_by_dir.setdefault(str(Path(remote_path).parent), set()).add(Path(remote_path).name)
+        listings = await asyncio.gather(*(self.list_files(remote_dir) for remote_dir in paths_by_dir))
+        file_ids = [
+            f['id']
+            for names, listing in zip(paths_by_dir.values(), listings)
+            for f in listing if f['name'] in names
+        ]
+        return await self._delete_ids(file_ids)
+
+    async def delete_listed(self, remote_directory: str, listed_files: list) -> int:
+        """Exclui em lotes usando os IDs que a própria listagem já trouxe."""
+        if not self.creds:
+            self.logger.error("Autenticação com o Google Drive falhou. Não é possível excluir arquivos.")
+            return 0
+        return await self._delete_ids([f['id'] for f in listed_files])
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
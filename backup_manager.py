@@ -1,21 +1,160 @@
 # backup_manager.py
 import os
 import shutil
-import hashlib
 import zipfile
 import json
+import time
 import logging
 import fnmatch
+import stat
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from fileutils import atomic_write_json, fsync_directory
+from hashing import DEFAULT_ALGORITHM, available_algorithms, format_digest, hash_file, new_hasher, parse_digest
+from metrics import StageTimer, TimedWriter
+from retention import BackupHistoryIndex
+from status_store import StatusStore
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem flock, o journal fica sem dono e a recuperação sempre é executada
+    fcntl = None
+
+class _ZipVolumeWriter:
+    """
+    Escreve membros em volumes zip independentes, com limite de tamanho opcional.
+
+    Cada volume é escrito como `<nome>.partial` e só recebe o nome final depois de
+    fechado e sincronizado com o disco; volumes concluídos são repassados a `on_volume`.
+    """
+
+    def __init__(self, backup_root_path, base_name, volume_size=0, on_volume=None, timer=None):
+        self.backup_root_path = backup_root_path
+        self.base_name = base_name
+        self.volume_size = volume_size
+        self.on_volume = on_volume
+        self.timer = timer or StageTimer()
+        self.volumes = []
+        self.logger = logging.getLogger(__name__)
+        self._volume_file = None
+        self._zipf = None
+
+    def current(self):
+        """Retorna o volume aberto, criando um novo se necessário."""
+        if self._zipf is None:
+            if self.volume_size:
+                self._volume_path = self.backup_root_path / f"{self.base_name}_vol{len(self.volumes) + 1:03d}.zip"
+            else:
+                self._volume_path = self.backup_root_path / f"{self.base_name}.zip"
+            self._partial_path = self._volume_path.with_name(self._volume_path.name + '.partial')
+            self.logger.info(f"Criando arquivo compactado: {self._volume_path}")
+            self._volume_file = TimedWriter(self._partial_path.open('wb'), self.timer, "write")
+            self._zipf = zipfile.ZipFile(self._volume_file, 'w', compression=zipfile.ZIP_DEFLATED)
+        return self._zipf
+
+    @contextmanager
+    def _compress_stage(self):
+        """Mede a etapa de compactação, descontando o tempo de escrita em disco já medido à parte."""
+        write_before = self.timer.seconds("write")
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        self.timer.add_time("compress", elapsed - (self.timer.seconds("write") - write_before))
+        info = self._zipf.infolist()[-1]
+        self.timer.count("compress", files=1, nbytes=info.file_size)
+
+    def write_file(self, file, arcname):
+        """Adiciona um arquivo do disco ao volume atual."""
+        zipf = self.current()
+        with self._compress_stage():
+            zipf.write(file, arcname)
+        self.member_written()
+
+    def member_written(self):
+        """Fecha o volume atual se ele atingiu o limite de tamanho."""
+        # Um membro nunca é dividido entre volumes, então um arquivo maior que o
+        # limite ocupa sozinho um volume; isso mantém cada volume legível isoladamente.
+        if self.volume_size and self._volume_file.tell() >= self.volume_size:
+            self._commit_volume()
+
+    def copy_member(self, source_zip, info, hasher=None):
+        """
+        Copia um membro de outro zip em blocos, sem carregá-lo inteiro na memória. Se
+        `hasher` for informado, ele recebe o conteúdo do membro durante a cópia.
+        """
+        target_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+        target_info.compress_type = zipfile.ZIP_DEFLATED
+        target_info.external_attr = info.external_attr
+        target_info.file_size = info.file_size  # Permite ao zipfile decidir sobre ZIP64
+        zipf = self.current()
+        with self._compress_stage():
+            with source_zip.open(info) as fsrc, zipf.open(target_info, 'w') as fdst:
+                if hasher is None:
+                    shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+                else:
+                    for chunk in iter(lambda: fsrc.read(1024 * 1024), b""):
+                        hasher.update(chunk)
+                        fdst.write(chunk)
+        self.member_written()
+
+    def _commit_volume(self):
+        with self.timer.stage("write"):
+            self._zipf.close()
+            self._zipf = None
+            self._volume_file.flush()
+            os.fsync(self._volume_file.fileno())
+            self._volume_file.close()
+            self._volume_file = None
+            os.replace(self._partial_path, self._volume_path)
+            fsync_directory(self.backup_root_path)
+        self.timer.count("write", files=1)
+
+        self.volumes.append(str(self._volume_path))
+        if self.on_volume:
+            self.on_volume(str(self._volume_path))
+
+    def close(self):
+        """Conclui o último volume e retorna a lista de volumes gerados."""
+        if self._zipf is not None:
+            self._commit_volume()
+        return self.volumes
+
+    def abort(self):
+        """Fecha os arquivos abertos sem concluir o volume atual (o `.partial` fica para a recuperação)."""
+        if self._zipf is not None:
+            self._zipf.close()
+            self._zipf = None
+        if self._volume_file is not None:
+            self._volume_file.close()
+            self._volume_file = None
+
+
 class BackupManager:
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger(__name__)
         self.backup_root_path = Path(self.config.local_backup_directory)
         self.metadata_path = self.backup_root_path / 'backup_metadata.json'
+        self.journal_path = self.backup_root_path / 'backup_journal.json'
+        # Enquanto um processo detém o flock deste arquivo, ele é o dono do journal
+        self.lock_path = self.backup_root_path / 'backup_journal.lock'
+        self._journal_lock = None
+        self.status_store = StatusStore(self.backup_root_path)
+
+        hashing_config = self.config.get("hashing", {})
+        self.hash_algorithm = hashing_config.get("algorithm", DEFAULT_ALGORITHM)
+        if self.hash_algorithm not in available_algorithms():
+            self.logger.error(f"Algoritmo de hash '{self.hash_algorithm}' indisponível; usando {DEFAULT_ALGORITHM}.")
+            self.hash_algorithm = DEFAULT_ALGORITHM
+        self.hash_buffer_size = int(hashing_config.get("buffer_size_kb", 4096)) * 1024
+        self.hash_mmap_threshold = int(hashing_config.get("mmap_threshold_mb", 0)) * 1024 * 1024
         self._metadata = None
+        self._metadata_mtime = None
+        self._history_index = None
+        # Resultado registrado pela última operação deste processo (veja `_record_result`)
+        self.last_result = None
 
     @property
     def metadata(self):
@@ -23,10 +162,37 @@ class BackupManager:
             self._metadata = self._load_metadata()
         return self._metadata
 
+    @property
+    def history_index(self):
+        """Índice em memória do histórico de backups (construído uma vez por processo)."""
+        if self._history_index is None or self._history_index.history is not self.metadata["backup_history"]:
+            self._history_index = BackupHistoryIndex(self.metadata["backup_history"])
+        return self._history_index
+
+    @property
+    def schedule_state(self):
+        """Última e próxima execução de cada tarefa agendada, guardadas no arquivo de status."""
+        status = self.status_store.read() or {}
+        if "schedule" in status:
+            return status["schedule"]
+        # Versões anteriores guardavam o estado do agendador nos metadados
+        return self.metadata.get("schedule", {})
+
+    def save_schedule_state(self, state):
+        """
+        Grava o estado do agendador no arquivo de status, que é pequeno; o
+        `backup_metadata.json`, com os hashes de todos os arquivos, não é regravado.
+        """
+        self.status_store.update(schedule=state)
+        if self._metadata is not None:
+            # A cópia antiga nos metadados desaparece na próxima gravação deles
+            self._metadata.pop("schedule", None)
+
     def _load_metadata(self):
         """Carrega os metadados do arquivo JSON."""
         try:
             if self.metadata_path.exists():
+                self._metadata_mtime = self.metadata_path.stat().st_mtime_ns
                 with self.metadata_path.open('r', encoding='utf-8') as f:
                     return json.load(f)
         except (json.JSONDecodeError, IOError) as e:
@@ -39,28 +205,110 @@ class BackupManager:
         }
 
     def _save_metadata(self):
-        """Salva os metadados no arquivo JSON."""
+        """Salva os metadados no arquivo JSON (de forma atômica). Retorna False em caso de erro."""
         try:
             self.backup_root_path.mkdir(exist_ok=True)
-            with self.metadata_path.open('w', encoding='utf-8') as f:
-                json.dump(self.metadata, f, indent=4, default=str)
+            atomic_write_json(self.metadata_path, self.metadata, indent=4, default=str)
+            self._metadata_mtime = self.metadata_path.stat().st_mtime_ns
+            return True
         except IOError as e:
             self.logger.error(f"Erro ao salvar metadados: {e}")
+            return False
+
+    def _discard_unsaved_metadata(self):
+        """Descarta as alterações em memória; os metadados voltam a ser lidos do disco."""
+        self._metadata = None
 
-    def _calculate_file_hash(self, filepath):
-        """Calcula o hash SHA256 de um arquivo para detecção de mudanças."""
-        hasher = hashlib.sha256()
+    def _lock_journal(self, blocking):
+        """
+        Obtém o flock exclusivo que torna este processo o dono do journal. Retorna
+        False se outro processo já o detém e `blocking` for falso.
+        """
+        if self._journal_lock is not None:
+            return True
+        self.backup_root_path.mkdir(parents=True, exist_ok=True)
+        lock_file = self.lock_path.open('a')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                lock_file.close()
+                return False
+        self._journal_lock = lock_file
+        return True
+
+    def _unlock_journal(self):
+        if self._journal_lock is not None:
+            self._journal_lock.close()
+            self._journal_lock = None
+
+    @contextmanager
+    def _journal_ownership(self):
+        """
+        Mantém o journal sob o lock deste processo durante uma operação que grava
+        volumes. Se outro processo (por exemplo, o daemon) estiver no meio de um
+        backup, aguarda o seu término. Os metadados são relidos se outro processo os
+        alterou desde a última leitura.
+        """
+        if self._journal_lock is not None:
+            yield
+            return
+        if not self._lock_journal(blocking=False):
+            self.logger.warning("Outro processo está executando um backup; aguardando a sua conclusão...")
+            self._lock_journal(blocking=True)
         try:
-            with open(filepath, 'rb') as f:
-                for chunk in iter(lambda: f.read(8192), b""):
-                    hasher.update(chunk)
-            return hasher.hexdigest()
+            if self._metadata is not None:
+                try:
+                    changed = self.metadata_path.stat().st_mtime_ns != self._metadata_mtime
+                except FileNotFoundError:
+                    changed = self._metadata_mtime is not None
+                if changed:
+                    self._discard_unsaved_metadata()
+            yield
+        finally:
+            self._unlock_journal()
+
+    def _update_status(self, **fields):
+        """Atualiza o arquivo de status; uma falha aqui nunca interrompe o backup."""
+        try:
+            self.status_store.update(**fields)
+        except (IOError, TypeError) as e:
+            self.logger.error(f"Erro ao atualizar o arquivo de status: {e}")
+
+    def _record_result(self, action, ok, path=None, message=None):
+        self.last_result = {
+            "action": action,
+            "ok": ok,
+            "timestamp": datetime.now().isoformat(),
+            "path": path,
+            "message": message
+        }
+        self._update_status(last_result=self.last_result)
+
+    def _calculate_file_hash(self, filepath, algorithms=None):
+        """
+        Calcula o hash de um arquivo para detecção de mudanças, com o algoritmo configurado
+        em `hashing.algorithm` e, se informados, outros algoritmos na mesma leitura.
+        Retorna um dicionário {algoritmo: digest} ou None em caso de erro.
+        """
+        try:
+            return hash_file(filepath, algorithms or [self.hash_algorithm], self.hash_buffer_size, self.hash_mmap_threshold)
         except (IOError, PermissionError) as e:
             self.logger.error(f"Não foi possível calcular o hash de {filepath}: {e}")
             return None
 
-    def _get_files_to_backup(self, is_full_backup=False):
+    def _has_changed(self, previous_digest, digests):
+        """Compara o digest gravado com o calculado agora pelo mesmo algoritmo."""
+        if previous_digest is None:
+            return True
+        previous_algorithm, previous_hex = parse_digest(previous_digest)
+        current = digests.get(previous_algorithm)
+        # Sem um digest do mesmo algoritmo não há como comparar; o arquivo vai para o backup
+        return current is None or parse_digest(current)[1] != previous_hex
+
+    def _get_files_to_backup(self, is_full_backup=False, timer=None):
         """Retorna uma lista de arquivos que precisam de backup."""
+        timer = timer or StageTimer()
         source_dir = Path(self.config.source_directory)
         if not source_dir.is_dir():
             self.logger.error(f"Diretório de origem não encontrado: {source_dir}")
@@ -70,69 +318,244 @@ class BackupManager:
         current_hashes = {}
         exclude_patterns = self.config.exclude_patterns
 
-        for filepath in source_dir.rglob('*'):
-            if filepath.is_dir():
-                continue
-
+        with timer.stage("scan"):
             # Verifica se o arquivo ou qualquer um de seus diretórios pais corresponde a um padrão de exclusão
-            if any(fnmatch.fnmatch(part, pattern) for pattern in exclude_patterns for part in filepath.parts):
+            candidates = [
+                filepath for filepath in source_dir.rglob('*')
+                if not any(fnmatch.fnmatch(part, pattern) for pattern in exclude_patterns for part in filepath.parts)
+            ]
+        timer.count("scan", files=len(candidates))
+
+        for filepath in candidates:
+            with timer.stage("stat"):
+                try:
+                    file_stat = filepath.stat()
+                except OSError:
+                    continue
+            if not stat.S_ISREG(file_stat.st_mode):
                 continue
+            timer.count("stat", files=1, nbytes=file_stat.st_size)
 
-            new_hash = self._calculate_file_hash(filepath)
-            if not new_hash:
+            str_filepath = str(filepath)
+            previous_digest = self.metadata["file_hashes"].get(str_filepath)
+            algorithms = [self.hash_algorithm]
+            if previous_digest and not is_full_backup:
+                # Após uma troca de algoritmo, o digest antigo é recalculado na mesma leitura,
+                # para que a troca não faça todos os arquivos parecerem modificados.
+                previous_algorithm = parse_digest(previous_digest)[0]
+                if previous_algorithm != self.hash_algorithm and previous_algorithm in available_algorithms():
+                    algorithms.append(previous_algorithm)
+
+            with timer.stage("hash"):
+                digests = self._calculate_file_hash(filepath, algorithms)
+            if not digests:
                 continue
+            timer.count("hash", files=1, nbytes=file_stat.st_size)
 
-            str_filepath = str(filepath)
-            current_hashes[str_filepath] = new_hash
+            current_hashes[str_filepath] = digests[self.hash_algorithm]
 
-            if is_full_backup or self.metadata["file_hashes"].get(str_filepath) != new_hash:
+            if is_full_backup or self._has_changed(previous_digest, digests):
                 files_to_backup.append(filepath)
         
         return files_to_backup, current_hashes
 
-    def _create_backup_archive(self, files_to_backup, backup_type, timestamp):
-        """Cria um arquivo de backup (compactado ou não)."""
+    @staticmethod
+    def _backup_file_names(backup):
+        """Nomes dos arquivos (volumes e manifesto) referenciados por uma entrada do histórico."""
+        return {Path(f).name for f in backup.get('volumes', [backup['path']]) + [backup.get('manifest')] if f}
+
+    @staticmethod
+    def _belongs_to_backup(name, base_name):
+        """Indica se o arquivo `name` é um volume, o manifesto ou o diretório do backup `base_name`."""
+        return name == base_name or name.startswith(base_name + '.') or name.startswith(base_name + '_vol')
+
+    def _backup_base_name(self, backup_type, timestamp):
+        """
+        Retorna um nome-base ainda não usado para um backup.
+
+        Os nomes vão até o segundo; se já houver um backup com o mesmo nome (dois
+        backups no mesmo segundo), um sufixo numérico é acrescentado, para que um
+        backup nunca sobrescreva os volumes e o manifesto de outro.
+        """
+        base_name = f"{backup_type}_backup_{timestamp.strftime('%Y%m%d_%H%M%S')}"
+        taken = {p.name for p in self.backup_root_path.glob(f"{base_name}*")}
+        for backup in self.metadata["backup_history"]:
+            taken |= self._backup_file_names(backup)
+
+        candidate, suffix = base_name, 1
+        while any(self._belongs_to_backup(name, candidate) for name in taken):
+            candidate = f"{base_name}_{suffix}"
+            suffix += 1
+        return candidate
+
+    def _volume_size(self):
+        return int(self.config.compression_config.get("volume_size_mb") or 0) * 1024 * 1024
+
+    def _create_backup_archive(self, files_to_backup, base_name, on_volume=None, timer=None):
+        """
+        Cria um arquivo de backup (compactado ou não) e retorna a lista de volumes gerados.
+
+        Se `compression.volume_size_mb` estiver definido, o zip é dividido em volumes
+        independentes de até esse tamanho; cada volume concluído é repassado a
+        `on_volume` imediatamente, para que o upload ocorra durante a compactação.
+
+        Cada volume é escrito como `<nome>.partial` e só recebe o nome final depois
+        de fechado e sincronizado com o disco.
+        """
+        timer = timer or StageTimer()
         source_dir = Path(self.config.source_directory)
-        target_path_str = f"{backup_type}_backup_{timestamp.strftime('%Y%m%d_%H%M%S')}"
+        target_path_str = base_name
         target_path = self.backup_root_path / target_path_str
 
         try:
+            self.backup_root_path.mkdir(parents=True, exist_ok=True)
             if self.config.compression_config.get("enabled", True):
-                target_path_zip = target_path.with_suffix('.zip')
-                self.logger.info(f"Criando arquivo compactado: {target_path_zip}")
-                with zipfile.ZipFile(target_path_zip, 'w', compression=zipfile.ZIP_DEFLATED) as zipf:
+                writer = _ZipVolumeWriter(self.backup_root_path, target_path_str, self._volume_size(), on_volume, timer)
+                try:
                     for file in files_to_backup:
-                        zipf.write(file, file.relative_to(source_dir))
-                return str(target_path_zip)
+                        writer.write_file(file, file.relative_to(source_dir))
+                    return writer.close()
+                finally:
+                    writer.abort()
             else:
+                partial_path = target_path.with_name(target_path.name + '.partial')
                 self.logger.info(f"Copiando arquivos para: {target_path}")
-                target_path.mkdir(parents=True, exist_ok=True)
-                for file in files_to_backup:
-                    dest = target_path / file.relative_to(source_dir)
-                    dest.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.copy2(file, dest)
-                return str(target_path)
+                with timer.stage("write"):
+                    partial_path.mkdir(parents=True, exist_ok=True)
+                    for file in files_to_backup:
+                        dest = partial_path / file.relative_to(source_dir)
+                        dest.parent.mkdir(parents=True, exist_ok=True)
+                        shutil.copy2(file, dest)
+                    os.replace(partial_path, target_path)
+                    fsync_directory(self.backup_root_path)
+                timer.count("write", files=len(files_to_backup))
+                if on_volume:
+                    on_volume(str(target_path))
+                return [str(target_path)]
         except (IOError, PermissionError, zipfile.BadZipFile) as e:
             self.logger.error(f"Falha ao criar o arquivo de backup: {e}")
             return None
 
-    def _perform_backup(self, is_full_backup):
-        """Lógica central para executar um backup (completo ou incremental)."""
+    def _write_manifest(self, manifest_path, member_hashes):
+        """Grava o manifesto do backup: o hash de conteúdo de cada membro do arquivo."""
+        manifest = {
+            "algorithm": self.hash_algorithm,
+            "files": member_hashes
+        }
+        try:
+            atomic_write_json(manifest_path, manifest)
+            return str(manifest_path)
+        except IOError as e:
+            self.logger.error(f"Erro ao salvar o manifesto {manifest_path}: {e}")
+            return None
+
+    def recover_incomplete_backups(self):
+        """
+        Remove os restos de backups interrompidos por uma queda do processo.
+
+        Apaga volumes `.partial`, arquivos temporários de metadados e, se o journal
+        indicar um backup em andamento que não chegou aos metadados, todos os volumes
+        já concluídos desse backup. Nada é apagado enquanto outro processo vivo for o
+        dono do journal: esses arquivos pertencem a um backup em andamento.
+        """
+        if not self.backup_root_path.is_dir():
+            return
+        if self._journal_lock is not None:
+            self._remove_incomplete_backups()
+            return
+        if not self._lock_journal(blocking=False):
+            self.logger.info("Outro processo está executando um backup; recuperação de backups incompletos adiada.")
+            return
+        try:
+            self._remove_incomplete_backups()
+        finally:
+            self._unlock_journal()
+
+    def _remove_incomplete_backups(self):
+        orphans = set(self.backup_root_path.glob('*.partial')) | set(self.backup_root_path.glob('*.json.tmp'))
+        # O arquivo de status é gravado também pelas threads de upload, em paralelo ao backup
+        orphans.discard(self.status_store.path.with_name(self.status_store.path.name + '.tmp'))
+
+        if self.journal_path.exists():
+            try:
+                with self.journal_path.open('r', encoding='utf-8') as f:
+                    base_name = json.load(f).get("in_progress")
+            except (json.JSONDecodeError, IOError) as e:
+                self.logger.error(f"Journal de backup ilegível, ignorando: {e}")
+                base_name = None
+
+            committed = base_name and any(
+                self._belongs_to_backup(Path(b['path']).name, base_name) for b in self.metadata["backup_history"]
+            )
+            if base_name and not committed:
+                self.logger.warning(f"Backup interrompido encontrado no journal: {base_name}")
+                orphans |= {p for p in self.backup_root_path.glob(f"{base_name}*")
+                            if self._belongs_to_backup(p.name, base_name)}
+
+        for path in sorted(orphans):
+            try:
+                self.logger.warning(f"Removendo arquivo de backup incompleto: {path}")
+                if path.is_dir():
+                    shutil.rmtree(path)
+                else:
+                    path.unlink()
+            except (IOError, PermissionError) as e:
+                self.logger.error(f"Erro ao remover {path}: {e}")
+
+        self.journal_path.unlink(missing_ok=True)
+
+    def _begin_journal(self, base_name):
+        """Registra no journal o backup em andamento, antes de criar qualquer volume."""
+        self.backup_root_path.mkdir(parents=True, exist_ok=True)
+        atomic_write_json(self.journal_path, {"in_progress": base_name, "started": datetime.now().isoformat()})
+
+    def _perform_backup(self, is_full_backup, on_volume=None):
+        """
+        Lógica central para executar um backup (completo ou incremental).
+
+        `on_volume`, se informado, é chamado com o caminho de cada volume assim que
+        ele é concluído (por exemplo, para enfileirar o upload para a nuvem).
+        """
+        with self._journal_ownership():
+            return self._run_backup(is_full_backup, on_volume)
+
+    def _run_backup(self, is_full_backup, on_volume):
         backup_type = "full" if is_full_backup else "incremental"
         self.logger.info(f"Iniciando backup {backup_type}...")
+        self.recover_incomplete_backups()
 
-        files_to_backup, current_hashes = self._get_files_to_backup(is_full_backup)
+        timer = StageTimer()
+        files_to_backup, current_hashes = self._get_files_to_backup(is_full_backup, timer)
 
         if not files_to_backup:
             self.logger.info("Nenhum arquivo novo ou modificado para fazer backup.")
+            self._record_result(backup_type, True, message="Nenhum arquivo novo ou modificado")
             return None
 
         self.logger.info(f"Encontrados {len(files_to_backup)} arquivos para o backup {backup_type}.")
         timestamp = datetime.now()
-        archive_path = self._create_backup_archive(files_to_backup, backup_type, timestamp)
+        base_name = self._backup_base_name(backup_type, timestamp)
+        try:
+            self._begin_journal(base_name)
+        except IOError as e:
+            self.logger.error(f"Não foi possível gravar o journal de backup: {e}")
+            self._record_result(backup_type, False, message=str(e))
+            return None
+
+        volumes = self._create_backup_archive(files_to_backup, base_name, on_volume, timer)
 
-        if not archive_path:
+        if not volumes:
+            # Descarta os volumes que chegaram a ser concluídos antes da falha
+            self.recover_incomplete_backups()
+            self._record_result(backup_type, False, message="Falha ao criar o arquivo de backup")
             return None
+        archive_path = volumes[0]
+        manifest_path = self.backup_root_path / f"{base_name}.manifest.json"
+        source_dir = Path(self.config.source_directory)
+        manifest = self._write_manifest(manifest_path, {
+            file.relative_to(source_dir).as_posix(): current_hashes[str(file)]
+            for file in files_to_backup
+        })
 
         # Atualiza os metadados após um backup bem-sucedido
         if is_full_backup:
@@ -141,62 +564,107 @@ class BackupManager:
         else:
             self.metadata["file_hashes"].update(current_hashes)
 
-        self.metadata["backup_history"].append({
+        self.history_index.append({
             "type": backup_type,
             "timestamp": timestamp.isoformat(),
             "path": archive_path,
-            "file_count": len(files_to_backup)
+            "volumes": volumes,
+            "manifest": manifest,
+            "file_count": len(files_to_backup),
+            "metrics": timer.as_dict()
+        })
+        # O backup só é considerado concluído depois que os metadados estão no disco;
+        # até lá, o journal permite descartar seus volumes após uma queda.
+        if not self._save_metadata():
+            self._discard_unsaved_metadata()
+            self.recover_incomplete_backups()
+            self._record_result(backup_type, False, message="Falha ao salvar os metadados do backup")
+            return None
+        self.journal_path.unlink(missing_ok=True)
+        self._update_status(**{
+            f"last_{backup_type}_backup_ts": timestamp.isoformat(),
+            "total_backups": len(self.metadata["backup_history"])
         })
-        self._save_metadata()
-        self.logger.info(f"Backup {backup_type} concluído com sucesso: {archive_path}")
+        self._record_result(backup_type, True, path=archive_path)
+        self.logger.info(f"Backup {backup_type} concluído com sucesso: {archive_path} ({len(volumes)} volume(s))")
         return archive_path
 
-    def perform_full_backup(self):
-        return self._perform_backup(is_full_backup=True)
+    def perform_full_backup(self, on_volume=None):
+        return self._perform_backup(is_full_backup=True, on_volume=on_volume)
 
-    def perform_incremental_backup(self):
+    def perform_incremental_backup(self, on_volume=None):
         if not self.metadata.get("last_full_backup_ts"):
             self.logger.warning("Nenhum backup completo encontrado. Executando um backup completo primeiro.")
-            return self.perform_full_backup()
-        return self._perform_backup(is_full_backup=False)
+            return self.perform_full_backup(on_volume=on_volume)
+        return self._perform_backup(is_full_backup=False, on_volume=on_volume)
 
-    def cleanup_old_backups(self):
-        """Remove backups antigos com base na política de retenção."""
-        self.logger.info("Iniciando limpeza de backups antigos...")
-        policy = self.config.retention_policy
-        if not policy or not self.metadata["backup_history"]:
-            self.logger.info("Nenhuma política de retenção definida ou nenhum backup para limpar.")
+    def record_upload_metrics(self, archive_path, upload_metrics):
+        """Anexa ao histórico de um backup as métricas do upload dos seus volumes."""
+        if not upload_metrics:
             return
+        # Sob o lock do journal, e relendo os metadados se outro processo os alterou,
+        # para não sobrescrever um backup registrado enquanto os uploads terminavam
+        with self._journal_ownership():
+            for backup in reversed(self.metadata["backup_history"]):
+                if backup["path"] == archive_path:
+                    backup.setdefault("metrics", {}).update(upload_metrics)
+                    self._save_metadata()
+                    return
+
+    def record_verification(self, results):
+        """Registra no histórico o resultado de uma verificação de integridade."""
+        verified_at = datetime.now().isoformat()
+        results_by_path = {r["path"]: r for r in results}
+        # A verificação pode levar horas: os metadados são relidos sob o lock do journal
+        # antes da gravação, para não descartar backups concluídos nesse meio-tempo
+        with self._journal_ownership():
+            for backup in self.metadata["backup_history"]:
+                result = results_by_path.get(backup["path"])
+                if result:
+                    backup["last_verified"] = verified_at
+                    backup["verified_ok"] = result["ok"]
+            self._save_metadata()
+        self._update_status(last_verification={
+            "timestamp": verified_at,
+            "ok": all(r["ok"] for r in results),
+            "failed": sum(1 for r in results if not r["ok"])
+        })
 
-        keep_full = policy.get('keep_full_backups', 4)
-        keep_incremental_days = policy.get('keep_incremental_days', 30)
-        cutoff_date = datetime.now() - timedelta(days=keep_incremental_days)
-
-        full_backups = sorted([b for b in self.metadata["backup_history"] if b['type'] == 'full'], key=lambda x: x['timestamp'], reverse=True)
-        incrementals = [b for b in self.metadata["backup_history"] if b['type'] == 'incremental']
-
-        backups_to_keep = set()
-        # Mantém os N backups completos mais recentes
-        for backup in full_backups[:keep_full]:
-            backups_to_keep.add(backup['path'])
-
-        # Mantém incrementais recentes
-        for backup in incrementals:
-            backup_ts = datetime.fromisoformat(backup['timestamp'])
-            if backup_ts >= cutoff_date:
-                backups_to_keep.add(backup['path'])
-
-        backups_to_remove = []
-        updated_history = []
-
-        for backup in self.metadata["backup_history"]:
-            if backup['path'] in backups_to_keep:
-                updated_history.append(backup)
-            else:
-                backups_to_remove.append(backup)
-
-        for backup in backups_to_remove:
-            path = Path(backup['path'])
+    def cloud_retention_keep_names(self):
+        """
+        Retorna os nomes dos arquivos que devem ser mantidos na nuvem, segundo
+        `retention_policy.keep_cloud_backups`: os N backups mais recentes do histórico,
+        estendidos até o backup completo do qual dependem, para não deixar incrementais
+        órfãos na nuvem. Retorna None se a retenção remota não estiver configurada.
+        """
+        keep_cloud = self.config.retention_policy.get('keep_cloud_backups')
+        if keep_cloud is None:
+            return None
+        if keep_cloud <= 0 or not self.metadata["backup_history"]:
+            return set()
+
+        index = self.history_index
+        first = max(0, len(index.history) - keep_cloud)
+        chain_start = index.chain_start(first)
+        if chain_start is not None:
+            first = chain_start
+        return {Path(v).name for backup in index.history[first:] for v in backup.get('volumes', [backup['path']])}
+
+    def _remove_backup_files(self, backup):
+        """
+        Apaga do disco os volumes e o manifesto de um backup, exceto arquivos que
+        ainda são referenciados por algum backup mantido no histórico.
+        """
+        kept = set()
+        for other in self.metadata["backup_history"]:
+            kept |= {str(Path(f)) for f in other.get('volumes', [other['path']]) + [other.get('manifest')] if f}
+        for backup_file in backup.get('volumes', [backup['path']]) + [backup.get('manifest')]:
+            if not backup_file:
+                continue
+            path = Path(backup_file)
+            if str(path) in kept:
+                self.logger.warning(f"{path} ainda é referenciado por um backup mantido; arquivo preservado.")
+                continue
             try:
                 self.logger.info(f"Removendo backup antigo: {path}")
                 if path.is_file():
@@ -206,6 +674,140 @@ class BackupManager:
             except (IOError, PermissionError) as e:
                 self.logger.error(f"Erro ao remover {path}: {e}")
 
-        self.metadata["backup_history"] = updated_history
-        self._save_metadata()
-        self.logger.info("Limpeza de backups concluída.")
+    def _load_manifest_hashes(self, backup):
+        """Retorna o mapa membro -> hash do manifesto de um backup (vazio se não houver)."""
+        if not backup.get('manifest'):
+            return {}
+        try:
+            with open(backup['manifest'], 'r', encoding='utf-8') as f:
+                return json.load(f).get("files", {})
+        except (json.JSONDecodeError, IOError) as e:
+            self.logger.error(f"Erro ao ler o manifesto {backup['manifest']}: {e}")
+            return {}
+
+    def _synthesize_full_backup(self, chain, on_volume=None, timer=None):
+        """
+        Consolida um backup completo e os incrementais seguintes em um único backup
+        completo sintético, equivalente a restaurar a cadeia até o último incremental.
+        Retorna a entrada de histórico do novo backup, ou None em caso de falha.
+        """
+        if any(Path(v).is_dir() for backup in chain for v in backup.get('volumes', [backup['path']])):
+            self.logger.warning("Consolidação disponível apenas para backups compactados; cadeia mantida.")
+            return None
+
+        newest = chain[-1]
+        base_name = self._backup_base_name("full", datetime.fromisoformat(newest['timestamp']))
+        self.logger.info(f"Consolidando {len(chain)} backups em um backup completo sintético: {base_name}")
+
+        member_hashes = {}
+        seen = set()
+        writer = _ZipVolumeWriter(self.backup_root_path, base_name, self._volume_size(), on_volume, timer)
+        try:
+            self._begin_journal(base_name)
+            # Do mais recente para o mais antigo: a primeira versão encontrada de cada membro é a vigente
+            for backup in reversed(chain):
+                manifest_hashes = self._load_manifest_hashes(backup)
+                for volume in backup.get('volumes', [backup['path']]):
+                    with zipfile.ZipFile(volume) as source_zip:
+                        for info in source_zip.infolist():
+                            if info.is_dir() or info.filename in seen:
+                                continue
+                            seen.add(info.filename)
+                            if info.filename in manifest_hashes:
+                                writer.copy_member(source_zip, info)
+                                member_hashes[info.filename] = manifest_hashes[info.filename]
+                            else:
+                                # Backups anteriores aos manifestos: o hash é calculado na cópia,
+                                # para que o manifesto do backup sintético cubra todos os membros
+                                hasher = new_hasher(self.hash_algorithm, info.file_size)
+                                writer.copy_member(source_zip, info, hasher)
+                                member_hashes[info.filename] = format_digest(self.hash_algorithm, hasher.hexdigest())
+            volumes = writer.close()
+        except (IOError, PermissionError, zipfile.BadZipFile) as e:
+            self.logger.error(f"Falha ao consolidar a cadeia de backups: {e}")
+            writer.abort()
+            self.recover_incomplete_backups()
+            return None
+        if not volumes:
+            return None
+
+        manifest = self._write_manifest(self.backup_root_path / f"{base_name}.manifest.json", member_hashes)
+        return {
+            "type": "full",
+            "synthetic": True,
+            "timestamp": newest['timestamp'],
+            "path": volumes[0],
+            "volumes": volumes,
+            "manifest": manifest,
+            "file_count": len(seen)
+        }
+
+    def cleanup_old_backups(self, on_volume=None):
+        """
+        Remove backups antigos com base na política de retenção.
+
+        A retenção opera sobre cadeias (um backup completo e seus incrementais): as
+        `keep_full_backups` cadeias mais recentes são mantidas inteiras e as demais
+        removidas inteiras, de modo que nenhum incremental fica sem a sua base. Com
+        `consolidate_incrementals`, os incrementais mais antigos que
+        `keep_incremental_days` são mesclados com o seu backup completo em um backup
+        completo sintético; `on_volume` recebe os volumes gerados. Cada consolidação
+        regrava (e reenvia) o backup completo inteiro, então ela só ocorre quando uma
+        cadeia acumula `consolidate_min_incrementals` incrementais expirados.
+        """
+        self.logger.info("Iniciando limpeza de backups antigos...")
+        policy = self.config.retention_policy
+        if not policy or not self.metadata["backup_history"]:
+            self.logger.info("Nenhuma política de retenção definida ou nenhum backup para limpar.")
+            return
+
+        timer = StageTimer()
+        with self._journal_ownership(), timer.stage("cleanup"):
+            self._apply_retention(policy, timer, on_volume)
+        self._update_status(total_backups=len(self.metadata["backup_history"]))
+
+    def _apply_retention(self, policy, timer, on_volume=None):
+        """Aplica a política de retenção ao histórico (veja `cleanup_old_backups`)."""
+        keep_full = max(1, policy.get('keep_full_backups', 4))
+        keep_incremental_days = policy.get('keep_incremental_days', 30)
+        cutoff_ts = (datetime.now() - timedelta(days=keep_incremental_days)).isoformat()
+        index = self.history_index
+
+        # Os metadados são gravados antes de apagar os arquivos: uma queda no meio
+        # deixa no máximo arquivos sem referência, nunca referências a arquivos apagados.
+        backups_to_remove = index.remove_prefix(index.retention_boundary(keep_full))
+        if backups_to_remove:
+            if not self._save_metadata():
+                self._discard_unsaved_metadata()
+                self.logger.error("Limpeza interrompida: os metadados não puderam ser salvos.")
+                self._record_result("cleanup", False, message="Falha ao salvar os metadados da limpeza")
+                return
+            for backup in backups_to_remove:
+                self._remove_backup_files(backup)
+            timer.count("cleanup", files=len(backups_to_remove))
+
+        consolidated = 0
+        if policy.get('consolidate_incrementals', False):
+            min_incrementals = max(1, policy.get('consolidate_min_incrementals', 7))
+            # Do fim para o início, para que as posições das cadeias anteriores não mudem
+            for start, end in reversed(index.expired_chain_prefixes(cutoff_ts, min_incrementals)):
+                synthetic = self._synthesize_full_backup(index.history[start:end], on_volume, timer)
+                if not synthetic:
+                    continue
+                replaced = index.replace_range(start, end, synthetic)
+                if not self._save_metadata():
+                    # Sem os metadados no disco, o backup sintético é descartado pelo journal
+                    self._discard_unsaved_metadata()
+                    self.recover_incomplete_backups()
+                    self.logger.error("Consolidação interrompida: os metadados não puderam ser salvos.")
+                    self._record_result("cleanup", False, message="Falha ao salvar os metadados da consolidação")
+                    break
+                self.journal_path.unlink(missing_ok=True)
+                for backup in replaced:
+                    self._remove_backup_files(backup)
+                consolidated += len(replaced)
+                timer.count("cleanup", files=len(replaced))
+
+        if not backups_to_remove and not consolidated:
+            self.logger.info("Nenhum backup fora da política de retenção.")
+        self.logger.info(f"Limpeza de backups concluída: {len(backups_to_remove)} removido(s), {consolidated} consolidado(s).")
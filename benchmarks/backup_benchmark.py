@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Benchmark de ponta a ponta do BackupManager sobre conjuntos de dados sintéticos.
+
+Cada conjunto é gerado de forma determinística (semente fixa) em um diretório
+temporário. Para cada um são medidos o backup completo, um backup incremental
+após alterar uma fração dos arquivos, a sincronização com um provedor local e a
+limpeza. O resultado é um JSON que pode ser comparado entre commits:
+
+    python benchmarks/backup_benchmark.py --output atual.json
+    python benchmarks/backup_benchmark.py --output novo.json --compare atual.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import subprocess
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import BackupConfig
+from backup_manager import BackupManager
+from cloud_sync import CloudSyncManager
+
+
+def _write_file(path, size, rng):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Metade aleatória e metade repetida: dados parcialmente compressíveis, como arquivos reais
+    random_part = rng.randbytes(size // 2)
+    with path.open('wb') as f:
+        f.write(random_part)
+        f.write(b'backup' * ((size - len(random_part)) // 6 + 1))
+
+
+def generate_small_files(root, scale, rng):
+    """Muitos arquivos pequenos (1-16 KiB) em poucos diretórios."""
+    for i in range(int(5000 * scale)):
+        _write_file(root / f"dir{i % 50:02d}" / f"arquivo{i:06d}.txt", rng.randint(1024, 16 * 1024), rng)
+
+
+def generate_huge_files(root, scale, rng):
+    """Poucos arquivos grandes."""
+    for i in range(4):
+        _write_file(root / f"grande{i}.bin", int(64 * 1024 * 1024 * scale), rng)
+
+
+def generate_deep_nesting(root, scale, rng):
+    """Árvore profunda: cada arquivo em um caminho com muitos níveis."""
+    for i in range(int(1000 * scale)):
+        depth = 20 + i % 20
+        parts = [f"n{(i + level) % 7}" for level in range(depth)]
+        _write_file(root.joinpath(*parts) / f"folha{i:05d}.dat", rng.randint(512, 4096), rng)
+
+
+def generate_excluded_dirs(root, scale, rng):
+    """Poucos arquivos úteis e diretórios excluídos (node_modules, .git) muito maiores."""
+    for i in range(int(200 * scale)):
+        _write_file(root / "src" / f"modulo{i:04d}.py", rng.randint(1024, 8192), rng)
+    for excluded in ("node_modules", ".git", "__pycache__"):
+        for i in range(int(3000 * scale)):
+            _write_file(root / excluded / f"pkg{i % 100:03d}" / f"f{i:05d}.js", rng.randint(512, 4096), rng)
+
+
+def generate_low_change_rate(root, scale, rng):
+    """Conjunto médio usado com uma taxa de alteração baixa entre os backups."""
+    for i in range(int(3000 * scale)):
+        _write_file(root / f"area{i % 30:02d}" / f"doc{i:05d}.bin", rng.randint(4 * 1024, 64 * 1024), rng)
+
+
+# nome -> (gerador, fração dos arquivos alterados antes do incremental)
+DATASETS = {
+    "small_files": (generate_small_files, 0.05),
+    "huge_files": (generate_huge_files, 0.25),
+    "deep_nesting": (generate_deep_nesting, 0.05),
+    "excluded_dirs": (generate_excluded_dirs, 0.05),
+    "low_change_rate": (generate_low_change_rate, 0.001),
+}
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, round(time.perf_counter() - start, 4)
+
+
+def _modify_files(source_dir, fraction, rng):
+    """Altera uma fração dos arquivos (fora dos diretórios excluídos) e retorna quantos."""
+    files = sorted(p for p in source_dir.rglob('*') if p.is_file()
+                   and not any(part in ("node_modules", ".git", "__pycache__") for part in p.parts))
+    changed = rng.sample(files, max(1, int(len(files) * fraction)))
+    for path in changed:
+        with path.open('ab') as f:
+            f.write(rng.randbytes(128))
+    return len(changed)
+
+
+def run_dataset(name, scale, seed, workdir, config_overrides):
+    generator, change_fraction = DATASETS[name]
+    rng = random.Random(seed)
+    base = Path(workdir) / name
+    source_dir = base / "origem"
+    generator(source_dir, scale, rng)
+
+    config_data = {
+        "source_directory": str(source_dir),
+        "local_backup_directory": str(base / "backups"),
+        "cloud_provider": "local",
+        "cloud_directory": "/Backups",
+        "cloud_credentials": {"local": {"root_directory": str(base / "nuvem")}},
+        "retention_policy": {"keep_full_backups": 1, "keep_incremental_days": 30, "keep_cloud_backups": 2},
+        "monitoring": {"metrics_enabled": False},
+    }
+    for key, value in config_overrides.items():
+        config_data[key] = {**config_data.get(key, {}), **value} if isinstance(value, dict) else value
+    config_path = base / "config.json"
+    config_path.write_text(json.dumps(config_data), encoding='utf-8')
+
+    config = BackupConfig(str(config_path))
+    manager = BackupManager(config)
+    sync_manager = CloudSyncManager(config)
+
+    source_files = sum(1 for p in source_dir.rglob('*') if p.is_file())
+    source_bytes = sum(p.stat().st_size for p in source_dir.rglob('*') if p.is_file())
+
+    full_path, full_seconds = _timed(manager.perform_full_backup)
+    changed = _modify_files(source_dir, change_fraction, rng)
+    incremental_path, incremental_seconds = _timed(manager.perform_incremental_backup)
+
+    volumes = [v for b in manager.metadata["backup_history"] for v in b.get("volumes", [b["path"]])]
+    _, sync_seconds = _timed(lambda: [sync_manager.sync_to_cloud(v) for v in volumes])
+    sync_manager.close()
+
+    # Um segundo backup completo torna o primeiro elegível para a limpeza
+    _modify_files(source_dir, change_fraction, rng)
+    manager.perform_full_backup()
+    _, cleanup_seconds = _timed(manager.cleanup_old_backups)
+
+    history = manager.metadata["backup_history"]
+    return {
+        "source_files": source_files,
+        "source_bytes": source_bytes,
+        "changed_files": changed,
+        "seconds": {
+            "full_backup": full_seconds,
+            "incremental_backup": incremental_seconds,
+            "sync": sync_seconds,
+            "cleanup": cleanup_seconds,
+        },
+        "full_backup_stages": next((b.get("metrics") for b in history if b["path"] == full_path), None),
+        "incremental_backup_stages": next((b.get("metrics") for b in history if b["path"] == incremental_path), None),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Imprime a variação de cada tempo em relação a um resultado anterior."""
+    print(f"\nComparação com {baseline.get('commit') or 'resultado anterior'}:")
+    for name, data in results["datasets"].items():
+        previous = baseline.get("datasets", {}).get(name)
+        if not previous:
+            continue
+        for operation, seconds in data["seconds"].items():
+            old = previous["seconds"].get(operation)
+            if old:
+                print(f"  {name:<16} {operation:<20} {old:>9.3f}s -> {seconds:>9.3f}s ({(seconds - old) / old * 100:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de ponta a ponta do sistema de backup')
+    parser.add_argument('--datasets', default=','.join(DATASETS), help='Conjuntos a executar, separados por vírgula')
+    parser.add_argument('--scale', type=float, default=1.0, help='Fator de escala do tamanho dos conjuntos')
+    parser.add_argument('--seed', type=int, default=42, help='Semente para a geração dos dados')
+    parser.add_argument('--config', help='JSON com chaves de configuração a sobrepor (ex.: {"hashing": {"algorithm": "blake3"}})')
+    parser.add_argument('--output', help='Grava os resultados em JSON neste arquivo')
+    parser.add_argument('--compare', help='JSON de uma execução anterior para comparação')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    overrides = json.loads(args.config) if args.config else {}
+
+    results = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": args.scale,
+        "seed": args.seed,
+        "config_overrides": overrides,
+        "datasets": {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.datasets.split(','):
+            print(f"Executando conjunto '{name}'...")
+            results["datasets"][name] = run_dataset(name, args.scale, args.seed, workdir, overrides)
+            for operation, seconds in results["datasets"][name]["seconds"].items():
+                print(f"  {operation:<20} {seconds:>9.3f}s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(results, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
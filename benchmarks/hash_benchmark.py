@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark dos algoritmos de hash usados na detecção de mudanças.
+
+Mede a vazão (MB/s) de cada algoritmo disponível, com leitura em blocos de
+tamanhos diferentes e com mmap, sobre arquivos sintéticos. Exemplo:
+
+    python benchmarks/hash_benchmark.py --size-mb 512 --json resultados.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hashing import available_algorithms, hash_file
+
+
+def run_case(path, algorithm, buffer_size, use_mmap, repeat):
+    """Executa um caso `repeat` vezes e retorna o melhor tempo, em segundos."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hash_file(path, [algorithm], buffer_size=buffer_size, mmap_threshold=1 if use_mmap else 0)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmark dos algoritmos de hash')
+    parser.add_argument('--size-mb', type=int, default=256, help='Tamanho do arquivo sintético')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetições por caso (vale o melhor tempo)')
+    parser.add_argument('--buffers-kb', default='8,64,1024,4096', help='Tamanhos de bloco a testar, em KiB')
+    parser.add_argument('--json', dest='json_path', help='Grava os resultados em JSON neste arquivo')
+    args = parser.parse_args()
+
+    buffer_sizes = [int(kb) * 1024 for kb in args.buffers_kb.split(',')]
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'dados.bin')
+        with open(path, 'wb') as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1024 * 1024))
+
+        # Aquece o cache de páginas para medir o hash, não o disco
+        hash_file(path, ["sha256"])
+
+        for algorithm in available_algorithms():
+            cases = [(size, False) for size in buffer_sizes] + [(0, True)]
+            for buffer_size, use_mmap in cases:
+                seconds = run_case(path, algorithm, buffer_size or buffer_sizes[-1], use_mmap, args.repeat)
+                result = {
+                    "algorithm": algorithm,
+                    "read": "mmap" if use_mmap else f"{buffer_size // 1024} KiB",
+                    "seconds": round(seconds, 4),
+                    "mb_per_s": round(args.size_mb / seconds, 1)
+                }
+                results.append(result)
+                print(f"{result['algorithm']:<10} {result['read']:<10} {result['mb_per_s']:>10.1f} MB/s")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({"size_mb": args.size_mb, "results": results}, f, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
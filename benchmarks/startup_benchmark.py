@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Mede o tempo de partida dos comandos de consulta da CLI (`status` e `list-backups`).
+
+Cada comando é executado várias vezes em um processo novo, sobre uma instalação
+sintética (configuração, arquivo de status e histórico com alguns backups). Do
+tempo medido é descontada a partida do próprio interpretador (`python -c pass`),
+e o resultado é comparado com um orçamento em milissegundos:
+
+    python benchmarks/startup_benchmark.py --budget-ms 150
+
+O script termina com código 1 se algum comando exceder o orçamento. Também
+confere que os comandos de consulta não gravam o arquivo de configuração.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+COMMANDS = {
+    "status": ["status"],
+    "list-backups": ["list-backups"],
+}
+
+
+def _prepare_installation(base, history_size):
+    """Cria configuração, status e metadados mínimos para os comandos de consulta."""
+    backup_dir = base / "backups"
+    backup_dir.mkdir(parents=True)
+    history = [
+        {
+            "type": "full" if i % 7 == 0 else "incremental",
+            "timestamp": f"2024-01-01T00:00:{i % 60:02d}.{i:06d}",
+            "path": str(backup_dir / f"backup_{i:05d}.zip"),
+            "file_count": 100,
+        }
+        for i in range(history_size)
+    ]
+    (backup_dir / "backup_metadata.json").write_text(json.dumps({
+        "last_full_backup_ts": history[-1]["timestamp"] if history else None,
+        "file_hashes": {},
+        "backup_history": history,
+    }), encoding='utf-8')
+    (backup_dir / "backup_status.json").write_text(json.dumps({
+        "last_full_backup_ts": history[-1]["timestamp"] if history else None,
+        "total_backups": history_size,
+        "pending_uploads": 0,
+    }), encoding='utf-8')
+
+    config_path = base / "config.json"
+    config_path.write_text(json.dumps({
+        "source_directory": str(base / "origem"),
+        "local_backup_directory": str(backup_dir),
+        "cloud_provider": "google_drive",
+    }), encoding='utf-8')
+    return config_path
+
+
+def _run(args, env):
+    start = time.perf_counter()
+    subprocess.run(args, cwd=REPO_DIR, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def _median_ms(args, env, runs):
+    _run(args, env)  # Aquecimento (cache de bytecode e do sistema de arquivos)
+    return statistics.median(_run(args, env) for _ in range(runs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mede a partida dos comandos de consulta da CLI')
+    parser.add_argument('--runs', type=int, default=10, help='Execuções por comando')
+    parser.add_argument('--history', type=int, default=200, help='Backups no histórico sintético')
+    parser.add_argument('--budget-ms', type=float, default=150.0,
+                        help='Tempo máximo por comando, descontada a partida do interpretador')
+    parser.add_argument('--output', help='Grava os resultados em JSON neste arquivo')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    results = {"budget_ms": args.budget_ms, "commands": {}}
+    over_budget = []
+
+    with tempfile.TemporaryDirectory() as workdir:
+        config_path = _prepare_installation(Path(workdir), args.history)
+        config_mtime = config_path.stat().st_mtime_ns
+
+        interpreter_ms = _median_ms([sys.executable, "-c", "pass"], env, args.runs)
+        results["interpreter_ms"] = round(interpreter_ms, 1)
+        print(f"{'interpretador':<15} {interpreter_ms:>8.1f} ms")
+
+        for name, command in COMMANDS.items():
+            total_ms = _median_ms([sys.executable, "cli.py", "--config", str(config_path), *command], env, args.runs)
+            net_ms = total_ms - interpreter_ms
+            results["commands"][name] = {"total_ms": round(total_ms, 1), "net_ms": round(net_ms, 1)}
+            marker = "" if net_ms <= args.budget_ms else "  (acima do orçamento)"
+            print(f"{name:<15} {total_ms:>8.1f} ms (líquido {net_ms:.1f} ms){marker}")
+            if net_ms > args.budget_ms:
+                over_budget.append(name)
+
+        config_rewritten = config_path.stat().st_mtime_ns != config_mtime
+        results["config_rewritten"] = config_rewritten
+        if config_rewritten:
+            print("Os comandos de consulta regravaram o arquivo de configuração.")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+    return 1 if over_budget or config_rewritten else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
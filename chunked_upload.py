@@ -0,0 +1,70 @@
+# chunked_upload.py
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
+from pathlib import Path
+
+
+class ChunkUploadError(Exception):
+    """Uma parte não pôde ser enviada após todas as tentativas."""
+
+
+class ChunkedUploader:
+    """
+    Motor de upload em partes compartilhado pelos provedores de nuvem.
+
+    O arquivo é dividido em partes de `part_size` bytes, e cada parte é entregue a
+    uma função `send_part(part_number, offset, data)` do provedor, que retorna o
+    identificador da parte (ex.: o ETag no S3). Cada parte tem suas próprias
+    novas tentativas, com espera exponencial. Com `max_workers` > 1 as partes são
+    enviadas em paralelo; com 1, em ordem, como exigem as sessões de upload do
+    OneDrive. Cada worker lê sua parte do disco apenas quando vai enviá-la, então
+    a memória usada é limitada a `max_workers` partes.
+    """
+
+    def __init__(self, part_size, max_workers=1, retry_attempts=3, retry_delay=1.0):
+        if part_size <= 0:
+            raise ValueError("O tamanho da parte deve ser positivo.")
+        self.part_size = part_size
+        self.max_workers = max(1, max_workers)
+        self.retry_attempts = max(1, retry_attempts)
+        self.retry_delay = retry_delay
+        self.logger = logging.getLogger(__name__)
+
+    def parts(self, size):
+        """Retorna (número da parte, deslocamento, tamanho) de cada parte, com numeração a partir de 1."""
+        return [
+            (number, offset, min(self.part_size, size - offset))
+            for number, offset in enumerate(range(0, size, self.part_size), start=1)
+        ]
+
+    def _send_with_retries(self, local_path, send_part, number, offset, length):
+        with open(local_path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(length)
+        for attempt in range(1, self.retry_attempts + 1):
+            try:
+                return send_part(number, offset, data)
+            except Exception as e:
+                if attempt == self.retry_attempts:
+                    raise ChunkUploadError(f"Falha ao enviar a parte {number} de {Path(local_path).name}: {e}") from e
+                self.logger.warning(f"Erro ao enviar a parte {number} de {Path(local_path).name} "
+                                    f"(tentativa {attempt} de {self.retry_attempts}): {e}")
+                time.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+    def upload(self, local_path, send_part):
+        """Envia todas as partes do arquivo e retorna os resultados de `send_part`, na ordem das partes."""
+        parts = self.parts(Path(local_path).stat().st_size)
+        if self.max_workers == 1 or len(parts) <= 1:
+            return [self._send_with_retries(local_path, send_part, *part) for part in parts]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="chunk-upload") as executor:
+            futures = [executor.submit(self._send_with_retries, local_path, send_part, *part) for part in parts]
+            done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            failed = next((future for future in done if future.exception()), None)
+            if failed:
+                # Uma parte que esgotou as tentativas condena o upload: as que ainda não começaram são canceladas
+                for future in pending:
+                    future.cancel()
+                raise failed.exception()
+            return [future.result() for future in futures]
@@ -1,24 +1,27 @@
 #!/usr/bin/env python3
 
+import os
+import shutil
 import click
 import logging
 from config import BackupConfig
-from backup_manager import BackupManager
 
 # Configuração básica de logging para a CLI
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Comandos que apenas consultam o estado: carregam a configuração sem gravá-la.
+# Os módulos de backup, verificação e nuvem são importados só pelos comandos que os usam,
+# para manter a partida destes comandos rápida (ver benchmarks/startup_benchmark.py).
+READ_ONLY_COMMANDS = {'status', 'list-backups'}
+
 @click.group()
 @click.option('--config', 'config_path', default='config_avancada.json', help='Caminho para o arquivo de configuração.')
 @click.pass_context
 def cli(ctx, config_path):
     """Interface de Linha de Comando para o Sistema de Backup."""
     try:
-        config = BackupConfig(config_path)
-        ctx.obj = {
-            'config': config,
-            'backup_manager': BackupManager(config)
-        }
+        config = BackupConfig(config_path, read_only=ctx.invoked_subcommand in READ_ONLY_COMMANDS)
+        ctx.obj = {'config': config}
     except FileNotFoundError:
         click.echo(f"Erro: Arquivo de configuração '{config_path}' não encontrado.")
         ctx.exit(1)
@@ -26,12 +29,19 @@ def cli(ctx, config_path):
         click.echo(f"Erro ao carregar a configuração: {e}")
         ctx.exit(1)
 
+def _backup_manager(ctx):
+    """Retorna o BackupManager do contexto, construindo-o no primeiro uso."""
+    if 'backup_manager' not in ctx.obj:
+        from backup_manager import BackupManager
+        ctx.obj['backup_manager'] = BackupManager(ctx.obj['config'])
+    return ctx.obj['backup_manager']
+
 @cli.command()
 @click.option('--type', 'backup_type', type=click.Choice(['full', 'incremental']), required=True, help='O tipo de backup a ser executado.')
 @click.pass_context
 def backup(ctx, backup_type):
     """Executa um backup completo ou incremental sob demanda."""
-    manager = ctx.obj['backup_manager']
+    manager = _backup_manager(ctx)
     click.echo(f"Iniciando backup {backup_type}...")
     
     try:
@@ -52,7 +62,7 @@ def backup(ctx, backup_type):
 @click.pass_context
 def list_backups(ctx):
     """Lista o histórico de backups registrados nos metadados."""
-    manager = ctx.obj['backup_manager']
+    manager = _backup_manager(ctx)
     history = manager.metadata.get('backup_history', [])
     
     if not history:
@@ -73,38 +83,98 @@ def list_backups(ctx):
         )
 
 @cli.command()
+@click.option('--local-only', is_flag=True, help='Não aplica a retenção às cópias na nuvem.')
 @click.pass_context
-def cleanup(ctx):
+def cleanup(ctx, local_only):
     """Executa a limpeza de backups antigos com base na política de retenção."""
-    manager = ctx.obj['backup_manager']
+    manager = _backup_manager(ctx)
     click.echo("Iniciando limpeza de backups antigos...")
     
     try:
-        manager.cleanup_old_backups()
+        if local_only:
+            manager.cleanup_old_backups()
+        else:
+            from cloud_sync import CloudSyncManager
+            sync_manager = CloudSyncManager(ctx.obj['config'])
+            try:
+                deleted = sync_manager.run_cleanup(manager)
+            finally:
+                sync_manager.close()
+            click.echo(f"Backups removidos da nuvem: {deleted}")
         click.secho("Limpeza concluída com sucesso.", fg='green')
     except Exception as e:
         click.secho(f"Falha na limpeza: {e}", fg='red')
         ctx.exit(1)
 
+@cli.command()
+@click.option('--sample', is_flag=True, help='Verifica apenas a amostra do dia (rotação definida em verification.sample_rotation_days).')
+@click.pass_context
+def verify(ctx, sample):
+    """Verifica a integridade dos backups locais (CRC e hashes do manifesto)."""
+    from verifier import BackupVerifier
+
+    verifier = BackupVerifier(ctx.obj['config'], _backup_manager(ctx))
+    click.echo("Iniciando verificação de integridade...")
+
+    results = verifier.verify_all(sample=sample)
+    if not results:
+        click.echo("Nenhum backup encontrado no histórico.")
+        return
+
+    failed = [r for r in results if not r['ok']]
+    for result in failed:
+        click.secho(f"FALHA: {result['path']}", fg='red')
+        for failure in result['failures']:
+            click.echo(f"  - {failure}")
+
+    if failed:
+        click.secho(f"{len(failed)} de {len(results)} backup(s) com falha de integridade.", fg='red')
+        ctx.exit(1)
+    click.secho(f"Todos os {len(results)} backup(s) estão íntegros.", fg='green')
+
 @cli.command()
 @click.pass_context
 def status(ctx):
     """Exibe um status rápido do sistema de backup."""
-    manager = ctx.obj['backup_manager']
-    metadata = manager.metadata
+    from health_check import evaluate_status
+    from status_store import StatusStore
+
+    config = ctx.obj['config']
+    backup_dir = config.local_backup_directory
+    # Lê apenas o arquivo de status, sem carregar o backup_metadata.json completo; os
+    # campos que ele ainda não registrou são obtidos dos metadados
+    status_data = StatusStore(backup_dir).load()
 
     click.echo("--- Status do Sistema de Backup ---")
-    
-    last_full = metadata.get('last_full_backup_ts')
+
+    if status_data is None:
+        click.secho("Nenhum status registrado ainda (nenhum backup executado desde a instalação).", fg='yellow')
+        return
+
+    last_full = status_data.get('last_full_backup_ts')
     if last_full:
         click.echo(f"Último Backup Completo: {last_full}")
     else:
         click.secho("Nenhum backup completo executado ainda.", fg='yellow')
+    click.echo(f"Último Backup Incremental: {status_data.get('last_incremental_backup_ts') or '-'}")
+
+    last_result = status_data.get('last_result')
+    if last_result:
+        color = 'green' if last_result.get('ok') else 'red'
+        outcome = "sucesso" if last_result.get('ok') else f"falha ({last_result.get('message')})"
+        click.secho(f"Última Execução: {last_result.get('action')} em {last_result.get('timestamp')} - {outcome}", fg=color)
 
-    total_backups = len(metadata.get('backup_history', []))
-    click.echo(f"Total de Backups no Histórico: {total_backups}")
+    last_upload = status_data.get('last_upload')
+    if last_upload:
+        click.echo(f"Último Upload: {last_upload.get('timestamp')} - {'sucesso' if last_upload.get('ok') else 'falha'}")
+    click.echo(f"Uploads Pendentes: {status_data.get('pending_uploads', 0)}")
+    click.echo(f"Total de Backups no Histórico: {status_data.get('total_backups', 0)}")
 
-    # TODO: Adicionar mais métricas, como espaço em disco usado.
+    if os.path.isdir(backup_dir):
+        usage = shutil.disk_usage(backup_dir)
+        click.echo(f"Espaço Livre no Disco de Backup: {usage.free / 1024 ** 3:.1f} GB de {usage.total / 1024 ** 3:.1f} GB")
+        for _, message in evaluate_status(config, status_data, backup_dir):
+            click.secho(f"Alerta: {message}", fg='yellow')
 
 if __name__ == '__main__':
     cli()
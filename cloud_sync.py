@@ -1,23 +1,42 @@
 # cloud_sync.py
 import os
+import re
+import base64
+import pickle
+import hashlib
+import shutil
 import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from abc import ABC, abstractmethod
 from pathlib import Path
+from urllib.parse import quote
 
-# Tente importar bibliotecas do Google; se falhar, o GoogleDriveProvider não funcionará.
-try:
-    from googleapiclient.discovery import build
-    from google.oauth2.credentials import Credentials
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from google.auth.transport.requests import Request
-    from googleapiclient.http import MediaFileUpload
-    import pickle
-    GOOGLE_LIBS_AVAILABLE = True
-except ImportError:
-    GOOGLE_LIBS_AVAILABLE = False
+from chunked_upload import ChunkedUploader, ChunkUploadError
+from metrics import StageTimer
+from status_store import StatusStore
+
+DRIVE_BATCH_SIZE = 100  # Limite de chamadas por requisição em lote da API do Drive
+# Nome dos arquivos gerados pelo BackupManager; a retenção remota nunca toca outros arquivos.
+BACKUP_NAME_PATTERN = re.compile(r'^(full|incremental)_backup_(\d{8}_\d{6})')
+
+# Limites da API do S3
+S3_MIN_PART_SIZE = 5 * 1024 * 1024
+S3_MAX_PARTS = 10000
+S3_DELETE_BATCH_SIZE = 1000
+
+GRAPH_DRIVE_URL = "https://graph.microsoft.com/v1.0/me/drive"
+# As partes de uma sessão de upload do OneDrive devem ser múltiplas de 320 KiB
+ONEDRIVE_CHUNK_ALIGNMENT = 320 * 1024
+# e menores que 60 MiB por requisição: a maior parte múltipla de 320 KiB abaixo do limite
+ONEDRIVE_MAX_CHUNK_SIZE = 60 * 1024 * 1024 - ONEDRIVE_CHUNK_ALIGNMENT
 
 class CloudProvider(ABC):
     """Interface abstrata para provedores de armazenamento em nuvem."""
+    # Indica se o provedor aceita chamadas simultâneas de várias threads
+    concurrent_safe = False
+
     @abstractmethod
     def upload_file(self, local_path: Path, remote_path: str) -> bool:
         """Faz upload de um arquivo para a nuvem."""
@@ -25,7 +44,7 @@ class CloudProvider(ABC):
 
     @abstractmethod
     def list_files(self, remote_directory: str) -> list:
-        """Lista arquivos em um diretório remoto."""
+        """Lista arquivos em um diretório remoto como dicionários com ao menos 'name' e 'size'."""
         pass
 
     @abstractmethod
@@ -33,62 +52,114 @@ class CloudProvider(ABC):
         """Exclui um arquivo remoto."""
         pass
 
+    def delete_files(self, remote_paths: list) -> int:
+        """Exclui vários arquivos remotos e retorna quantos foram excluídos.
+
+        Provedores com API em lote devem sobrescrever este método.
+        """
+        return sum(1 for remote_path in remote_paths if self.delete_file(remote_path))
+
+    def delete_listed(self, remote_directory: str, listed_files: list) -> int:
+        """Exclui arquivos obtidos de `list_files(remote_directory)` e retorna quantos foram excluídos.
+
+        Provedores que identificam arquivos por ID (como o Google Drive) usam os IDs
+        da própria listagem, em vez de listar o diretório de novo para resolvê-los.
+        """
+        return self.delete_files([f"{remote_directory}/{f['name']}" for f in listed_files])
+
+    def close(self):
+        """Libera conexões e outros recursos do provedor."""
+        pass
+
+GOOGLE_LIBS_HINT = "Bibliotecas do Google Drive não instaladas. Execute 'pip install google-api-python-client google-auth-httplib2 google-auth-oauthlib'"
+DRIVE_SCOPES = ['https://www.googleapis.com/auth/drive.file']
+
+def load_google_credentials(drive_config: dict, logger):
+    """
+    Carrega as credenciais OAuth 2.0 do Google Drive a partir do token salvo,
+    renovando-as ou executando o fluxo de autorização quando necessário.
+    Retorna None se não houver credenciais disponíveis.
+    """
+    # Importadas apenas ao construir um provedor: a pilha do Google leva centenas de
+    # milissegundos para carregar e comandos sem upload não precisam dela.
+    try:
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from google.auth.transport.requests import Request
+    except ImportError:
+        raise ImportError(GOOGLE_LIBS_HINT)
+
+    token_path = Path(drive_config.get("token_file", "token.json"))
+    creds_path = Path(drive_config.get("credentials_file", "credentials.json"))
+    creds = None
+    if token_path.exists():
+        with token_path.open('rb') as token:
+            creds = pickle.load(token)
+
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            try:
+                creds.refresh(Request())
+            except Exception as e:
+                logger.error(f"Erro ao renovar token do Google Drive: {e}")
+                creds = None # Força a re-autenticação
+        
+        if not creds:
+            if not creds_path.exists():
+                logger.error(f"Arquivo de credenciais não encontrado: {creds_path}")
+                return None
+            
+            flow = InstalledAppFlow.from_client_secrets_file(creds_path, DRIVE_SCOPES)
+            creds = flow.run_local_server(port=0)
+
+        with token_path.open('wb') as token:
+            pickle.dump(creds, token)
+
+    return creds
+
 class GoogleDriveProvider(CloudProvider):
     """Implementação para o Google Drive."""
     def __init__(self, config):
-        if not GOOGLE_LIBS_AVAILABLE:
-            raise ImportError("Bibliotecas do Google Drive não instaladas. Execute 'pip install google-api-python-client google-auth-httplib2 google-auth-oauthlib'")
-        
+        try:
+            from googleapiclient.discovery import build
+            from googleapiclient.http import MediaFileUpload
+        except ImportError:
+            raise ImportError(GOOGLE_LIBS_HINT)
+        self._build = build
+        self._media_upload_class = MediaFileUpload
+
+        self.logger = logging.getLogger(__name__)
         self.config = config.get("cloud_credentials", {}).get("google_drive", {})
-        self.token_path = Path(self.config.get("token_file", "token.json"))
-        self.creds_path = Path(self.config.get("credentials_file", "credentials.json"))
         self.service = self._authenticate()
-        self.logger = logging.getLogger(__name__)
+        self._folder_ids = {}
 
     def _authenticate(self):
         """Autentica com a API do Google Drive usando OAuth 2.0."""
-        creds = None
-        if self.token_path.exists():
-            with self.token_path.open('rb') as token:
-                creds = pickle.load(token)
-
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                try:
-                    creds.refresh(Request())
-                except Exception as e:
-                    self.logger.error(f"Erro ao renovar token do Google Drive: {e}")
-                    creds = None # Força a re-autenticação
-            
-            if not creds:
-                if not self.creds_path.exists():
-                    self.logger.error(f"Arquivo de credenciais não encontrado: {self.creds_path}")
-                    return None
-                
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self.creds_path, ['https://www.googleapis.com/auth/drive.file']
-                )
-                creds = flow.run_local_server(port=0)
-
-            with self.token_path.open('wb') as token:
-                pickle.dump(creds, token)
-        
-        return build('drive', 'v3', credentials=creds)
+        creds = load_google_credentials(self.config, self.logger)
+        if not creds:
+            return None
+        return self._build('drive', 'v3', credentials=creds)
 
-    def _get_or_create_folder_id(self, remote_path: str) -> str:
-        """Obtém o ID de uma pasta, criando-a se não existir."""
+    def _get_or_create_folder_id(self, remote_path: str, create: bool = True) -> str:
+        """Obtém o ID de uma pasta, criando-a se não existir (ou retornando None, se `create` for False)."""
         if not self.service:
             return None
-            
+
+        remote_path = str(Path(remote_path))
+        if remote_path in self._folder_ids:
+            return self._folder_ids[remote_path]
+
         parent_id = 'root'
-        components = Path(remote_path).parts
-        
+        # A raiz ('/') não é uma pasta no Drive; apenas os componentes abaixo dela são resolvidos
+        components = [c for c in Path(remote_path).parts if c not in ('/', '\\')]
+
         for component in components:
             query = f"name='{component}' and mimeType='application/vnd.google-apps.folder' and '{parent_id}' in parents and trashed=false"
             response = self.service.files().list(q=query, fields="files(id)").execute()
             files = response.get('files', [])
             
             if not files:
+                if not create:
+                    return None
                 file_metadata = {
                     'name': component,
                     'mimeType': 'application/vnd.google-apps.folder',
@@ -98,6 +169,8 @@ class GoogleDriveProvider(CloudProvider):
                 parent_id = folder.get('id')
             else:
                 parent_id = files[0].get('id')
+
+        self._folder_ids[remote_path] = parent_id
         return parent_id
 
     def upload_file(self, local_path: Path, remote_path: str) -> bool:
@@ -113,7 +186,7 @@ class GoogleDriveProvider(CloudProvider):
                 return False
 
             file_metadata = {'name': local_path.name, 'parents': [folder_id]}
-            media = MediaFileUpload(str(local_path), resumable=True)
+            media = self._media_upload_class(str(local_path), resumable=True)
             
             self.service.files().create(
                 body=file_metadata, media_body=media, fields='id'
@@ -126,54 +199,463 @@ class GoogleDriveProvider(CloudProvider):
             return False
 
     def list_files(self, remote_directory: str) -> list:
-        # A ser implementado se necessário
-        self.logger.warning("list_files não implementado para GoogleDriveProvider.")
-        return []
+        if not self.service:
+            self.logger.error("Autenticação com o Google Drive falhou. Não é possível listar arquivos.")
+            return []
+
+        try:
+            folder_id = self._get_or_create_folder_id(remote_directory, create=False)
+            if not folder_id:
+                return []
+
+            files = []
+            page_token = None
+            while True:
+                response = self.service.files().list(
+                    q=f"'{folder_id}' in parents and trashed=false",
+                    fields="nextPageToken, files(id, name, size, md5Checksum, modifiedTime)",
+                    pageSize=1000,
+                    pageToken=page_token
+                ).execute()
+                for item in response.get('files', []):
+                    item['size'] = int(item.get('size', 0))
+                    files.append(item)
+                page_token = response.get('nextPageToken')
+                if not page_token:
+                    return files
+        except Exception as e:
+            self.logger.error(f"Erro ao listar arquivos no Google Drive: {e}", exc_info=True)
+            return []
+
+    def delete_file(self, remote_path: str) -> bool:
+        return self.delete_files([remote_path]) == 1
+
+    def delete_files(self, remote_paths: list) -> int:
+        """Exclui arquivos usando requisições em lote (até 100 exclusões por chamada HTTP)."""
+        if not self.service:
+            self.logger.error("Autenticação com o Google Drive falhou. Não é possível excluir arquivos.")
+            return 0
+
+        # Uma única listagem por diretório resolve os IDs de todos os arquivos a excluir
+        file_ids = []
+        paths_by_dir = {}
+        for remote_path in remote_paths:
+            paths_by_dir.setdefault(str(Path(remote_path).parent), set()).add(Path(remote_path).name)
+        for remote_dir, names in paths_by_dir.items():
+            file_ids.extend(f['id'] for f in self.list_files(remote_dir) if f['name'] in names)
+        return self._delete_ids(file_ids)
+
+    def delete_listed(self, remote_directory: str, listed_files: list) -> int:
+        """Exclui em lotes usando os IDs que a própria listagem já trouxe."""
+        if not self.service:
+            self.logger.error("Autenticação com o Google Drive falhou. Não é possível excluir arquivos.")
+            return 0
+        return self._delete_ids([f['id'] for f in listed_files])
+
+    def _delete_ids(self, file_ids: list) -> int:
+        """Exclui arquivos pelo ID, em lotes de até `DRIVE_BATCH_SIZE` exclusões."""
+        deleted = 0
+
+        def on_response(request_id, response, exception):
+            nonlocal deleted
+            if exception is not None:
+                self.logger.error(f"Erro ao excluir o arquivo {request_id} do Google Drive: {exception}")
+            else:
+                deleted += 1
+
+        for start in range(0, len(file_ids), DRIVE_BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for file_id in file_ids[start:start + DRIVE_BATCH_SIZE]:
+                batch.add(self.service.files().delete(fileId=file_id), request_id=file_id)
+            try:
+                batch.execute()
+            except Exception as e:
+                self.logger.error(f"Erro ao executar exclusão em lote no Google Drive: {e}", exc_info=True)
+
+        return deleted
+
+class LocalDirectoryProvider(CloudProvider):
+    """
+    "Nuvem" em um diretório local ou montado (NAS, disco externo).
+
+    Útil também como provedor de referência em testes e benchmarks, sem rede.
+    """
+    def __init__(self, config):
+        self.logger = logging.getLogger(__name__)
+        root = config.get("cloud_credentials", {}).get("local", {}).get("root_directory")
+        if not root:
+            raise ValueError("cloud_credentials.local.root_directory não configurado para o provedor local.")
+        self.root = Path(root)
+
+    def _resolve(self, remote_path: str) -> Path:
+        return self.root / str(remote_path).lstrip('/\\')
+
+    def upload_file(self, local_path: Path, remote_path: str) -> bool:
+        target = self._resolve(remote_path)
+        partial = target.with_name(target.name + '.partial')
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(local_path, partial)
+            os.replace(partial, target)
+            self.logger.info(f"Cópia para o diretório remoto bem-sucedida: {target}")
+            return True
+        except (IOError, PermissionError) as e:
+            self.logger.error(f"Erro ao copiar {local_path} para {target}: {e}")
+            return False
+
+    def list_files(self, remote_directory: str) -> list:
+        directory = self._resolve(remote_directory)
+        if not directory.is_dir():
+            return []
+        return [
+            {"name": entry.name, "size": entry.stat().st_size}
+            for entry in directory.iterdir()
+            if entry.is_file() and not entry.name.endswith('.partial')
+        ]
 
     def delete_file(self, remote_path: str) -> bool:
-        # A ser implementado se necessário
-        self.logger.warning("delete_file não implementado para GoogleDriveProvider.")
-        return False
+        try:
+            self._resolve(remote_path).unlink()
+            return True
+        except (IOError, PermissionError) as e:
+            self.logger.error(f"Erro ao excluir {remote_path}: {e}")
+            return False
+
+def _md5_base64(data: bytes) -> str:
+    """MD5 no formato do cabeçalho Content-MD5, que faz o servidor rejeitar partes corrompidas."""
+    return base64.b64encode(hashlib.md5(data).digest()).decode('ascii')
+
+def s3_etag(local_path: Path, part_size: int) -> str:
+    """
+    Calcula o ETag que o S3 atribui a um arquivo enviado com este tamanho de parte:
+    o MD5 do conteúdo, em um upload simples, ou o MD5 dos MD5 das partes seguido
+    de "-<número de partes>", em um upload multipart.
+    """
+    part_digests = []
+    with open(local_path, 'rb') as f:
+        for part in iter(lambda: f.read(part_size), b""):
+            part_digests.append(hashlib.md5(part).digest())
+    if len(part_digests) <= 1:
+        return (part_digests[0] if part_digests else hashlib.md5().digest()).hex()
+    return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
+class S3Provider(CloudProvider):
+    """
+    Armazenamento de objetos compatível com S3 (AWS S3, MinIO, Wasabi, Backblaze B2...).
+
+    Arquivos maiores que `performance.chunk_size_mb` são enviados em upload
+    multipart, com até `performance.max_concurrent_parts` partes em paralelo e
+    novas tentativas por parte. Antes de enviar, o ETag do objeto remoto é
+    comparado com o calculado localmente, e objetos já enviados são ignorados.
+    A listagem e as exclusões da retenção são feitas no servidor, por prefixo e em lote.
+    """
+    # Os clientes do boto3 são thread-safe
+    concurrent_safe = True
+
+    def __init__(self, config):
+        try:
+            import boto3
+            from botocore.config import Config as BotoConfig
+            from botocore.exceptions import BotoCoreError, ClientError
+        except ImportError:
+            raise ImportError("Biblioteca boto3 não instalada. Execute 'pip install boto3'")
+        self._client_errors = (BotoCoreError, ClientError)
+
+        self.logger = logging.getLogger(__name__)
+        s3_config = config.get("cloud_credentials", {}).get("s3", {})
+        self.bucket = s3_config.get("bucket")
+        if not self.bucket:
+            raise ValueError("cloud_credentials.s3.bucket não configurado para o provedor S3.")
+
+        performance = config.get("performance", {})
+        self.part_size = max(S3_MIN_PART_SIZE, int(performance.get("chunk_size_mb", 10)) * 1024 * 1024)
+        self.part_workers = max(1, int(performance.get("max_concurrent_parts", 4)))
+        self.retry_attempts = int(performance.get("retry_attempts", 3))
+        max_uploads = max(1, int(performance.get("max_concurrent_uploads", 3)))
+
+        self.client = boto3.client(
+            's3',
+            endpoint_url=s3_config.get("endpoint_url"),
+            region_name=s3_config.get("region_name"),
+            aws_access_key_id=s3_config.get("access_key_id"),
+            aws_secret_access_key=s3_config.get("secret_access_key"),
+            config=BotoConfig(
+                # Uma conexão para cada parte em andamento de cada upload simultâneo
+                max_pool_connections=max(10, max_uploads * self.part_workers),
+                read_timeout=performance.get("timeout_seconds", 300),
+                retries={"mode": "standard"},
+            ),
+        )
+
+    @staticmethod
+    def _key(remote_path: str) -> str:
+        return str(remote_path).replace('\\', '/').lstrip('/')
+
+    def _part_size_for(self, size: int) -> int:
+        # Um objeto multipart tem no máximo 10.000 partes
+        return max(self.part_size, -(-size // S3_MAX_PARTS))
+
+    def _already_uploaded(self, local_path: Path, key: str, size: int, part_size: int) -> bool:
+        """Verifica se o objeto remoto tem o mesmo tamanho e o mesmo ETag do arquivo local."""
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except self._client_errors:
+            return False
+        if head.get('ContentLength') != size:
+            return False
+        return head.get('ETag', '').strip('"') == s3_etag(local_path, part_size)
+
+    def _multipart_upload(self, local_path: Path, key: str, part_size: int):
+        upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=key)['UploadId']
+
+        def send_part(part_number, offset, data):
+            response = self.client.upload_part(
+                Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=part_number,
+                Body=data, ContentMD5=_md5_base64(data)
+            )
+            return {"PartNumber": part_number, "ETag": response['ETag']}
+
+        try:
+            uploader = ChunkedUploader(part_size, self.part_workers, self.retry_attempts)
+            parts = uploader.upload(local_path, send_part)
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+            )
+        except BaseException:
+            # Sem o abort, as partes já enviadas continuam ocupando espaço (e sendo cobradas) no bucket
+            try:
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            except self._client_errors as e:
+                self.logger.error(f"Erro ao abortar o upload multipart de {key}: {e}")
+            raise
+
+    def upload_file(self, local_path: Path, remote_path: str) -> bool:
+        key = self._key(remote_path)
+        try:
+            size = local_path.stat().st_size
+            part_size = self._part_size_for(size)
+            if self._already_uploaded(local_path, key, size, part_size):
+                self.logger.info(f"{local_path.name} já está no bucket com o mesmo conteúdo; upload ignorado.")
+                return True
+
+            if size <= part_size:
+                data = local_path.read_bytes()
+                self.client.put_object(Bucket=self.bucket, Key=key, Body=data, ContentMD5=_md5_base64(data))
+            else:
+                self._multipart_upload(local_path, key, part_size)
+
+            self.logger.info(f"Upload para o bucket {self.bucket} bem-sucedido: {key}")
+            return True
+        except (ChunkUploadError, OSError, *self._client_errors) as e:
+            self.logger.error(f"Erro durante o upload para o S3: {e}", exc_info=True)
+            return False
+
+    def list_files(self, remote_directory: str) -> list:
+        prefix = self._key(remote_directory).rstrip('/')
+        prefix = f"{prefix}/" if prefix else ""
+        files = []
+        try:
+            paginator = self.client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix, Delimiter='/'):
+                for obj in page.get('Contents', []):
+                    files.append({
+                        "name": obj['Key'][len(prefix):],
+                        "size": obj['Size'],
+                        "etag": obj['ETag'].strip('"'),
+                        "modifiedTime": obj['LastModified'].isoformat(),
+                    })
+            return files
+        except self._client_errors as e:
+            self.logger.error(f"Erro ao listar objetos no S3: {e}", exc_info=True)
+            return []
+
+    def delete_file(self, remote_path: str) -> bool:
+        return self.delete_files([remote_path]) == 1
+
+    def delete_files(self, remote_paths: list) -> int:
+        """Exclui objetos com DeleteObjects (até 1000 chaves por requisição)."""
+        keys = [self._key(remote_path) for remote_path in remote_paths]
+        deleted = 0
+        for start in range(0, len(keys), S3_DELETE_BATCH_SIZE):
+            batch = keys[start:start + S3_DELETE_BATCH_SIZE]
+            try:
+                response = self.client.delete_objects(
+                    Bucket=self.bucket, Delete={"Objects": [{"Key": key} for key in batch]}
+                )
+            except self._client_errors as e:
+                self.logger.error(f"Erro ao executar exclusão em lote no S3: {e}", exc_info=True)
+                continue
+            deleted += len(response.get('Deleted', []))
+            for error in response.get('Errors', []):
+                self.logger.error(f"Erro ao excluir {error.get('Key')} do S3: {error.get('Message')}")
+        return deleted
 
 class OneDriveProvider(CloudProvider):
-    """Implementação para o OneDrive (placeholder)."""
+    """
+    Implementação para o OneDrive, pela API do Microsoft Graph.
+
+    Os uploads usam uma sessão de upload, com as partes enviadas em ordem (como
+    exige o OneDrive) pelo mesmo motor de upload em partes do provedor S3. A
+    obtenção do token OAuth ainda não está implementada: o token de acesso é lido
+    de `cloud_credentials.onedrive.access_token`.
+    """
     def __init__(self, config):
+        try:
+            import requests
+        except ImportError:
+            raise ImportError("Biblioteca requests não instalada. Execute 'pip install requests'")
+        self._requests = requests
+
         self.logger = logging.getLogger(__name__)
-        self.logger.warning("O provedor OneDrive não está implementado.")
+        self.access_token = config.get("cloud_credentials", {}).get("onedrive", {}).get("access_token")
+        if not self.access_token:
+            self.logger.warning("Token de acesso do OneDrive não configurado (cloud_credentials.onedrive.access_token).")
+
+        performance = config.get("performance", {})
+        chunk_size = min(int(performance.get("chunk_size_mb", 10)) * 1024 * 1024, ONEDRIVE_MAX_CHUNK_SIZE)
+        self.part_size = max(ONEDRIVE_CHUNK_ALIGNMENT, chunk_size - chunk_size % ONEDRIVE_CHUNK_ALIGNMENT)
+        self.retry_attempts = int(performance.get("retry_attempts", 3))
+        self.timeout = performance.get("timeout_seconds", 300)
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {self.access_token}"
+
+    @staticmethod
+    def _item_url(remote_path: str) -> str:
+        path = str(remote_path).replace('\\', '/').strip('/')
+        return f"{GRAPH_DRIVE_URL}/root:/{quote(path)}"
 
     def upload_file(self, local_path: Path, remote_path: str) -> bool:
-        self.logger.warning("upload_file não implementado para OneDrive.")
-        return False
+        if not self.access_token:
+            self.logger.error("OneDrive sem token de acesso. Não é possível fazer o upload.")
+            return False
+
+        item_url = self._item_url(remote_path)
+        try:
+            size = local_path.stat().st_size
+            if size == 0:
+                # Sessões de upload não aceitam arquivos vazios
+                self.session.put(f"{item_url}:/content", data=b"", timeout=self.timeout).raise_for_status()
+            else:
+                response = self.session.post(
+                    f"{item_url}:/createUploadSession",
+                    json={"item": {"@microsoft.graph.conflictBehavior": "replace"}},
+                    timeout=self.timeout,
+                )
+                response.raise_for_status()
+                upload_url = response.json()["uploadUrl"]
+
+                def send_part(part_number, offset, data):
+                    # A URL da sessão já é autenticada e não deve receber o cabeçalho Authorization
+                    self._requests.put(
+                        upload_url, data=data, timeout=self.timeout,
+                        headers={"Content-Range": f"bytes {offset}-{offset + len(data) - 1}/{size}"},
+                    ).raise_for_status()
+
+                ChunkedUploader(self.part_size, max_workers=1, retry_attempts=self.retry_attempts).upload(local_path, send_part)
+
+            self.logger.info(f"Upload para o OneDrive bem-sucedido: {local_path.name}")
+            return True
+        except (self._requests.RequestException, ChunkUploadError, OSError, KeyError) as e:
+            self.logger.error(f"Erro durante o upload para o OneDrive: {e}", exc_info=True)
+            return False
 
     def list_files(self, remote_directory: str) -> list:
-        return []
+        if not self.access_token:
+            return []
+
+        files = []
+        url = f"{self._item_url(remote_directory)}:/children"
+        try:
+            while url:
+                response = self.session.get(url, timeout=self.timeout)
+                if response.status_code == 404:
+                    return []
+                response.raise_for_status()
+                data = response.json()
+                files.extend({"name": item["name"], "size": item.get("size", 0)} for item in data.get("value", []) if "file" in item)
+                url = data.get("@odata.nextLink")
+            return files
+        except self._requests.RequestException as e:
+            self.logger.error(f"Erro ao listar arquivos no OneDrive: {e}", exc_info=True)
+            return []
 
     def delete_file(self, remote_path: str) -> bool:
-        return False
+        if not self.access_token:
+            return False
+        try:
+            response = self.session.delete(self._item_url(remote_path), timeout=self.timeout)
+            response.raise_for_status()
+            return True
+        except self._requests.RequestException as e:
+            self.logger.error(f"Erro ao excluir {remote_path} do OneDrive: {e}")
+            return False
 
 class CloudSyncManager:
     """Gerencia a sincronização de backups com um provedor de nuvem."""
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger(__name__)
-        self.provider = self._get_provider()
+        self._provider = None
+        self._provider_built = False
+        self._provider_lock = threading.Lock()
+        self._upload_executor = None
+        self._pending_uploads = []
+        self._upload_timer = None
+        self.last_upload_metrics = {}
+        self.status_store = StatusStore(self.config.local_backup_directory) if self.config.local_backup_directory else None
+
+    @property
+    def provider(self) -> CloudProvider | None:
+        """Provedor de nuvem, construído (e autenticado) apenas no primeiro uso."""
+        with self._provider_lock:
+            if not self._provider_built:
+                self._provider = self._get_provider()
+                self._provider_built = True
+        return self._provider
+
+    @provider.setter
+    def provider(self, provider):
+        self._provider = provider
+        self._provider_built = True
 
     def _get_provider(self) -> CloudProvider | None:
         """Retorna uma instância do provedor de nuvem com base na configuração."""
         provider_name = self.config.cloud_provider
         if provider_name == 'google_drive':
+            if self.config.get("performance", {}).get("async_io", True):
+                try:
+                    from async_cloud import AsyncGoogleDriveProvider, SyncProviderAdapter
+                    return SyncProviderAdapter(AsyncGoogleDriveProvider(self.config))
+                except ImportError as e:
+                    self.logger.info(f"{e}. Usando o cliente síncrono do Google Drive.")
             try:
                 return GoogleDriveProvider(self.config)
             except ImportError as e:
                 self.logger.error(e)
                 return None
         elif provider_name == 'onedrive':
-            return OneDriveProvider(self.config)
+            try:
+                return OneDriveProvider(self.config)
+            except ImportError as e:
+                self.logger.error(e)
+                return None
+        elif provider_name == 's3':
+            try:
+                return S3Provider(self.config)
+            except (ImportError, ValueError) as e:
+                self.logger.error(e)
+                return None
+        elif provider_name == 'local':
+            try:
+                return LocalDirectoryProvider(self.config)
+            except ValueError as e:
+                self.logger.error(e)
+                return None
         else:
             self.logger.info("Nenhum provedor de nuvem configurado.")
             return None
 
-    def sync_to_cloud(self, local_backup_path_str: str) -> bool:
+    def sync_to_cloud(self, local_backup_path_str: str, timer: StageTimer | None = None) -> bool:
         """Sincroniza um arquivo de backup local com a nuvem."""
         if not self.provider:
             self.logger.error("Sincronização com a nuvem falhou: nenhum provedor disponível.")
@@ -187,4 +669,190 @@ class CloudSyncManager:
         remote_path = f"{self.config.get('cloud_directory', '/Backups')}/{local_path.name}"
         
         self.logger.info(f"Iniciando sincronização de {local_path.name} para a nuvem...")
-        return self.provider.upload_file(local_path, remote_path)
+        timer = timer or StageTimer()
+        with timer.stage("upload"):
+            success = self.provider.upload_file(local_path, remote_path)
+        if success:
+            timer.count("upload", files=1, nbytes=local_path.stat().st_size)
+        return success
+
+    def upload_callback(self):
+        """
+        Retorna a função que enfileira o upload de cada volume (o `on_volume` do
+        BackupManager), ou None se não houver provedor: sem ele nada é enfileirado,
+        e o backup local é concluído normalmente.
+        """
+        return self.enqueue_upload if self.provider else None
+
+    def retry_failed_uploads(self) -> int:
+        """
+        Enfileira de novo os volumes cujo upload falhou em execuções anteriores
+        (`failed_uploads` no arquivo de status) e retorna quantos foram enfileirados.
+        Volumes que já não existem no disco, removidos pela retenção, saem da lista.
+        """
+        if not self.status_store or not self.provider:
+            return 0
+        failed = (self.status_store.read() or {}).get("failed_uploads", [])
+        missing = [path for path in failed if not Path(path).exists()]
+        if missing:
+            self._update_status(failed_uploads_remove=missing)
+        retry = [path for path in failed if path not in missing]
+        if retry:
+            self.logger.info(f"Reenviando {len(retry)} volume(s) cujo upload falhou anteriormente.")
+        for path in retry:
+            self.enqueue_upload(path)
+        return len(retry)
+
+    def run_backup(self, backup_manager, perform_backup):
+        """
+        Executa `perform_backup` (ex.: `backup_manager.perform_full_backup`) enviando
+        cada volume para a nuvem assim que ele é concluído, em paralelo à compactação.
+
+        Antes, reenfileira os uploads que falharam em execuções anteriores; os que
+        falharem agora ficam pendentes no arquivo de status, sem invalidar o backup
+        local. Retorna o caminho do backup, ou None.
+        """
+        on_volume = self.upload_callback()
+        if not on_volume:
+            return perform_backup()
+        self.retry_failed_uploads()
+        backup_path = perform_backup(on_volume=on_volume)
+        if not self.wait_for_uploads():
+            self.logger.warning("Um ou mais volumes não foram enviados; nova tentativa na próxima execução.")
+        if backup_path:
+            backup_manager.record_upload_metrics(backup_path, self.last_upload_metrics)
+        return backup_path
+
+    def run_cleanup(self, backup_manager) -> int:
+        """
+        Aplica a retenção local e, se houver provedor, a remota. Backups completos
+        sintéticos gerados pela consolidação também são enviados. Retorna quantos
+        arquivos foram removidos da nuvem.
+        """
+        self.run_backup(backup_manager, backup_manager.cleanup_old_backups)
+        if not self.provider:
+            return 0
+        return self.apply_retention(backup_manager.cloud_retention_keep_names())
+
+    def enqueue_upload(self, local_backup_path_str: str):
+        """Coloca um arquivo na fila de upload, que é processada em segundo plano."""
+        if Path(local_backup_path_str).is_dir():
+            # Backups sem compactação são diretórios, que nenhum provedor envia
+            self.logger.info(f"{local_backup_path_str} é um backup sem compactação; não é enviado para a nuvem.")
+            return
+        if self._upload_executor is None:
+            # Provedores assíncronos enviam vários volumes ao mesmo tempo pelo mesmo pool de
+            # conexões; os demais (como o cliente síncrono do Google Drive, que não é
+            # thread-safe) usam um único worker, e a fila ainda permite que o upload de
+            # um volume ocorra enquanto o próximo é criado.
+            workers = 1
+            if self.provider and self.provider.concurrent_safe:
+                workers = max(1, int(self.config.get("performance", {}).get("max_concurrent_uploads", 3)))
+            self._upload_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cloud-upload")
+        if self._upload_timer is None:
+            self._upload_timer = StageTimer()
+        self._update_status(pending_uploads_delta=1)
+        self._pending_uploads.append(
+            self._upload_executor.submit(self._queued_upload, local_backup_path_str, self._upload_timer)
+        )
+
+    def _queued_upload(self, local_backup_path_str: str, timer: StageTimer) -> bool:
+        """
+        Executa um upload da fila e registra seu resultado no arquivo de status. Um
+        upload que falha fica em `failed_uploads`, para `retry_failed_uploads`.
+        """
+        success = False
+        try:
+            success = self.sync_to_cloud(local_backup_path_str, timer)
+            return success
+        finally:
+            now = datetime.now().isoformat()
+            fields = {"last_upload": {"ok": success, "timestamp": now, "path": local_backup_path_str}}
+            if success:
+                fields["last_successful_upload_ts"] = now
+                fields["failed_uploads_remove"] = [local_backup_path_str]
+            else:
+                fields["failed_uploads_add"] = [local_backup_path_str]
+            self._update_status(pending_uploads_delta=-1, **fields)
+
+    def _update_status(self, **fields):
+        """Atualiza o arquivo de status; uma falha aqui nunca interrompe o upload."""
+        if not self.status_store:
+            return
+        try:
+            self.status_store.update(**fields)
+        except (IOError, TypeError) as e:
+            self.logger.error(f"Erro ao atualizar o arquivo de status: {e}")
+
+    def close(self):
+        """Aguarda os uploads enfileirados e libera o provedor (sessões HTTP, event loop)."""
+        self.wait_for_uploads()
+        if self._upload_executor is not None:
+            self._upload_executor.shutdown()
+            self._upload_executor = None
+        with self._provider_lock:
+            provider, self._provider, self._provider_built = self._provider, None, False
+        if provider:
+            provider.close()
+
+    def wait_for_uploads(self) -> bool:
+        """
+        Aguarda o fim dos uploads enfileirados. Retorna True se todos tiveram sucesso.
+
+        As métricas dos uploads aguardados ficam em `last_upload_metrics`.
+        """
+        pending, self._pending_uploads = self._pending_uploads, []
+        timer, self._upload_timer = self._upload_timer, None
+        success = True
+        for future in pending:
+            try:
+                success = future.result() and success
+            except Exception as e:
+                self.logger.error(f"Erro inesperado no upload em segundo plano: {e}", exc_info=True)
+                success = False
+        self.last_upload_metrics = timer.as_dict() if timer else {}
+        return success
+
+    def apply_retention(self, keep_names: set) -> int:
+        """
+        Aplica a retenção remota: exclui da nuvem os backups que não estão em `keep_names`.
+
+        Usa uma listagem do diretório remoto e exclusões em lote. Por segurança, só
+        remove arquivos com o padrão de nome do backup e mais antigos que o backup
+        mais antigo mantido.
+        """
+        if keep_names is None:
+            self.logger.info("Retenção remota não configurada (retention_policy.keep_cloud_backups).")
+            return 0
+        if not keep_names:
+            # Sem histórico local não há como saber o que manter; nunca apaga tudo às cegas
+            self.logger.info("Nenhum backup a manter na nuvem informado; retenção remota ignorada.")
+            return 0
+        if not self.provider:
+            self.logger.error("Retenção remota falhou: nenhum provedor disponível.")
+            return 0
+
+        kept_timestamps = [m.group(2) for m in map(BACKUP_NAME_PATTERN.match, keep_names) if m]
+        if not kept_timestamps:
+            return 0
+        oldest_kept = min(kept_timestamps)
+
+        remote_dir = self.config.get('cloud_directory', '/Backups')
+        timer = StageTimer()
+        with timer.stage("cleanup"):
+            to_delete = []
+            for remote_file in self.provider.list_files(remote_dir):
+                match = BACKUP_NAME_PATTERN.match(remote_file['name'])
+                if match and remote_file['name'] not in keep_names and match.group(2) < oldest_kept:
+                    to_delete.append(remote_file)
+
+            if not to_delete:
+                self.logger.info("Nenhum backup remoto a remover.")
+                return 0
+
+            self.logger.info(f"Removendo {len(to_delete)} arquivo(s) de backup antigos da nuvem...")
+            # A própria listagem é passada adiante, para que o provedor não precise listar de novo
+            deleted = self.provider.delete_listed(remote_dir, to_delete)
+        timer.count("cleanup", files=deleted)
+        self.logger.info(f"Retenção remota concluída: {deleted} de {len(to_delete)} arquivo(s) removido(s).")
+        return deleted
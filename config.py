@@ -1,8 +1,11 @@
 # config.py
+import copy
 import json
 import os
 import collections.abc
 
+from fileutils import atomic_write_json
+
 # Constante para a configuração padrão
 DEFAULT_CONFIG = {
     "source_directory": "/caminho/para/diretorio/origem",
@@ -12,22 +15,40 @@ DEFAULT_CONFIG = {
     "backup_schedule": {
         "full_backup_interval_days": 7,
         "incremental_interval_hours": 24,
-        "cloud_sync_interval_hours": 2
+        "cloud_sync_interval_hours": 2,
+        "cleanup_interval_days": 1,
+        "full_backup_cron": None,
+        "incremental_cron": None,
+        "cleanup_cron": None,
+        "verify_cron": None,
+        "blackout_windows": []
     },
     "retention_policy": {
         "keep_full_backups": 4,
-        "keep_incremental_days": 30
+        "keep_incremental_days": 30,
+        "consolidate_incrementals": False,
+        "consolidate_min_incrementals": 7
     },
     "compression": {
         "enabled": True,
         "level": 6,
-        "method": "zip"
+        "method": "zip",
+        "volume_size_mb": 0
     },
     "encryption": {
         "enabled": False,
         "password": None,
         "algorithm": "AES256"
     },
+    "monitoring": {
+        "metrics_enabled": True,
+        "metrics_host": "127.0.0.1",
+        "metrics_port": 9108,
+        "max_upload_lag_hours": 6,
+        "system_thresholds": {
+            "disk_min_gb": 10
+        }
+    },
     "notifications": {
         "email": {
             "enabled": False
@@ -36,11 +57,26 @@ DEFAULT_CONFIG = {
             "enabled": False
         }
     },
+    "hashing": {
+        "algorithm": "sha256",
+        "buffer_size_kb": 4096,
+        "mmap_threshold_mb": 0
+    },
+    "verification": {
+        "enabled": True,
+        "interval_hours": 24,
+        "sample_rotation_days": 7,
+        "max_workers": 4
+    },
     "exclude_patterns": ["*.tmp", "*.log", "__pycache__", ".git"],
     "performance": {
         "max_concurrent_uploads": 3,
+        "max_concurrent_requests": 16,
+        "max_concurrent_parts": 4,
+        "async_io": True,
         "chunk_size_mb": 10,
-        "timeout_seconds": 300
+        "timeout_seconds": 300,
+        "retry_attempts": 3
     }
 }
 
@@ -57,16 +93,23 @@ def deep_merge(d, u):
     return d
 
 class BackupConfig:
-    def __init__(self, config_file="config_avancada.json"):
+    def __init__(self, config_file="config_avancada.json", read_only=False):
+        """
+        Com `read_only=True` (comandos que apenas consultam o estado, como `status`),
+        a configuração é carregada sem nunca gravar o arquivo.
+        """
         self.config_file = config_file
+        self.read_only = read_only
         self._config = self.load_config()
 
     def load_config(self):
         """Carrega a configuração, mesclando com os padrões."""
-        config = DEFAULT_CONFIG.copy()
+        # Cópia profunda: a mesclagem altera os dicionários aninhados
+        config = copy.deepcopy(DEFAULT_CONFIG)
 
         if not os.path.exists(self.config_file):
-            self.save_config(config)
+            if not self.read_only:
+                self.save_config(config)
             return config
 
         try:
@@ -78,20 +121,23 @@ class BackupConfig:
 
         except json.JSONDecodeError as e:
             print(f"Erro ao decodificar o arquivo de configuração JSON: {e}")
-            # Opcional: poderia lançar uma exceção ou usar a configuração padrão
+            # Não regrava o arquivo: isso substituiria a configuração do usuário pelos padrões
+            return config
         except Exception as e:
             print(f"Erro inesperado ao carregar a configuração: {e}")
+            return config
 
-        self.save_config(config) # Salva para adicionar novas chaves padrão, se houver
+        # Salva apenas se a mesclagem adicionou novas chaves padrão
+        if config != user_config and not self.read_only:
+            self.save_config(config)
         return config
 
     def save_config(self, config=None):
-        """Salva a configuração atual no arquivo."""
+        """Salva a configuração atual no arquivo (de forma atômica)."""
         if config is None:
             config = self._config
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=4, ensure_ascii=False)
+            atomic_write_json(self.config_file, config, indent=4, ensure_ascii=False)
         except Exception as e:
             print(f"Erro ao salvar o arquivo de configuração: {e}")
 
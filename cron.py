@@ -0,0 +1,146 @@
+# cron.py
+from bisect import bisect_left
+from datetime import datetime, time, timedelta
+
+MONTH_NAMES = {name: i + 1 for i, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"])}
+DAY_NAMES = {name: i for i, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])}
+# Limite da busca pela próxima ocorrência; expressões como "0 0 30 2 *" nunca ocorrem
+MAX_SEARCH_DAYS = 5 * 366
+
+
+def _parse_field(text, low, high, names=None):
+    """Converte um campo do cron (`*`, listas, intervalos e passos) no conjunto de valores aceitos."""
+    names = names or {}
+
+    def value(token):
+        token = token.lower()
+        number = names[token] if token in names else int(token)
+        if not low <= number <= high:
+            raise ValueError(f"Valor fora do intervalo {low}-{high}: '{token}'")
+        return number
+
+    values = set()
+    for part in text.split(','):
+        part, has_step, step_text = part.partition('/')
+        step = int(step_text) if has_step else 1
+        if step < 1:
+            raise ValueError(f"Passo inválido no campo '{text}'")
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start_text, _, end_text = part.partition('-')
+            start, end = value(start_text), value(end_text)
+        else:
+            # "5/15" equivale a "5-<máximo>/15"
+            start = value(part)
+            end = high if has_step else start
+        if start > end:
+            raise ValueError(f"Intervalo invertido no campo '{text}'")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpression:
+    """
+    Expressão cron de 5 campos: minuto, hora, dia do mês, mês e dia da semana.
+
+    Aceita `*`, listas (`1,15`), intervalos (`1-5`), passos (`*/10`, `8-18/2`) e
+    nomes de meses e dias em inglês (`jan`, `mon`). Como no cron tradicional, se
+    o dia do mês e o dia da semana forem ambos restritos, basta um deles coincidir.
+    """
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Expressão cron deve ter 5 campos: '{expression}'")
+        self.expression = expression
+        try:
+            self.minutes = sorted(_parse_field(fields[0], 0, 59))
+            self.hours = _parse_field(fields[1], 0, 23)
+            self.days = _parse_field(fields[2], 1, 31)
+            self.months = _parse_field(fields[3], 1, 12, MONTH_NAMES)
+            # 0 e 7 representam o domingo
+            self.weekdays = {d % 7 for d in _parse_field(fields[4], 0, 7, DAY_NAMES)}
+        except ValueError as e:
+            raise ValueError(f"Expressão cron inválida '{expression}': {e}")
+        self._days_restricted = not fields[2].startswith('*')
+        self._weekdays_restricted = not fields[4].startswith('*')
+        # Rejeita já na criação expressões válidas que nunca ocorrem, como "0 0 30 2 *"
+        self.next_after(datetime.now())
+
+    def _day_matches(self, moment):
+        day_ok = moment.day in self.days
+        weekday_ok = moment.isoweekday() % 7 in self.weekdays
+        if self._days_restricted and self._weekdays_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, moment):
+        """Retorna a primeira ocorrência estritamente posterior a `moment`."""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=MAX_SEARCH_DAYS)
+        # Avança mês, dia ou hora inteiros sempre que o campo correspondente não coincide
+        while candidate <= limit:
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            else:
+                i = bisect_left(self.minutes, candidate.minute)
+                if i < len(self.minutes):
+                    return candidate.replace(minute=self.minutes[i])
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+        raise ValueError(f"A expressão cron '{self.expression}' nunca ocorre.")
+
+
+class BlackoutWindow:
+    """
+    Janela diária em que nenhuma tarefa agendada começa, no formato
+    `"[dias] HH:MM-HH:MM"`, por exemplo `"08:00-18:00"` ou `"mon-fri 08:00-18:00"`.
+
+    Os dias usam a sintaxe do campo dia da semana do cron e se referem ao início
+    da janela, que pode cruzar a meia-noite (`"22:00-02:00"`).
+    """
+
+    def __init__(self, text):
+        parts = text.split()
+        if len(parts) not in (1, 2):
+            raise ValueError(f"Janela de bloqueio inválida: '{text}'")
+        days, span = parts if len(parts) == 2 else ('*', parts[0])
+        try:
+            start_text, _, end_text = span.partition('-')
+            self.start = time.fromisoformat(start_text)
+            self.end = time.fromisoformat(end_text)
+            self.weekdays = {d % 7 for d in _parse_field(days, 0, 7, DAY_NAMES)}
+        except ValueError as e:
+            raise ValueError(f"Janela de bloqueio inválida '{text}': {e}")
+        if self.start == self.end:
+            raise ValueError(f"Janela de bloqueio vazia: '{text}'")
+        self.text = text
+
+    def end_if_active(self, moment):
+        """Se `moment` estiver dentro da janela, retorna quando ela termina; caso contrário, None."""
+        # A janela que contém `moment` pode ter começado no mesmo dia ou, se cruza a meia-noite, no anterior
+        for offset in (0, -1):
+            day = moment.date() + timedelta(days=offset)
+            if day.isoweekday() % 7 not in self.weekdays:
+                continue
+            start = datetime.combine(day, self.start)
+            end = datetime.combine(day if self.end > self.start else day + timedelta(days=1), self.end)
+            if start <= moment < end:
+                return end
+        return None
+
+
+def defer_past_blackouts(moment, windows):
+    """Adia `moment` para o fim das janelas de bloqueio em que ele cair, inclusive janelas encadeadas."""
+    # Cada janela pode adiar no máximo uma vez por dia da semana
+    for _ in range(7 * len(windows) + 1):
+        ends = [end for end in (w.end_if_active(moment) for w in windows) if end]
+        if not ends:
+            return moment
+        moment = max(ends)
+    raise ValueError("As janelas de bloqueio cobrem todos os horários; nenhuma tarefa poderia ser executada.")
@@ -0,0 +1,33 @@
+# fileutils.py
+import os
+import json
+from pathlib import Path
+
+
+def fsync_directory(path):
+    """Garante que renomeações dentro de um diretório cheguem ao disco (ignorado onde não é suportado)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_json(path, data, **dump_kwargs):
+    """
+    Grava um JSON de forma atômica: escreve em um arquivo temporário, faz fsync e
+    renomeia sobre o destino. Uma queda no meio da escrita preserva a versão anterior.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with tmp_path.open('w', encoding='utf-8') as f:
+        json.dump(data, f, **dump_kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_directory(path.parent)
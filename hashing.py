@@ -0,0 +1,110 @@
+# hashing.py
+import mmap
+import hashlib
+
+# Tente importar as bibliotecas de hash rápido; se falhar, apenas o SHA256 estará disponível.
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+DEFAULT_ALGORITHM = "sha256"
+DEFAULT_BUFFER_SIZE = 4 * 1024 * 1024
+# mmap desativado por padrão: veja `hash_file`
+DEFAULT_MMAP_THRESHOLD = 0
+# Acima deste tamanho o BLAKE3 usa várias threads (o ganho não compensa em arquivos pequenos)
+BLAKE3_MULTITHREAD_THRESHOLD = 16 * 1024 * 1024
+
+
+def available_algorithms():
+    """Retorna os algoritmos suportados cujas bibliotecas estão instaladas."""
+    algorithms = ["sha256"]
+    if BLAKE3_AVAILABLE:
+        algorithms.append("blake3")
+    if XXHASH_AVAILABLE:
+        algorithms.append("xxh3_128")
+    return algorithms
+
+
+def new_hasher(algorithm, size_hint=0):
+    """Cria um objeto de hash para o algoritmo informado."""
+    if algorithm == "sha256":
+        return hashlib.sha256()
+    if algorithm == "blake3":
+        if not BLAKE3_AVAILABLE:
+            raise ImportError("Biblioteca blake3 não instalada. Execute 'pip install blake3'")
+        if size_hint >= BLAKE3_MULTITHREAD_THRESHOLD:
+            return blake3.blake3(max_threads=blake3.blake3.AUTO)
+        return blake3.blake3()
+    if algorithm == "xxh3_128":
+        if not XXHASH_AVAILABLE:
+            raise ImportError("Biblioteca xxhash não instalada. Execute 'pip install xxhash'")
+        return xxhash.xxh3_128()
+    raise ValueError(f"Algoritmo de hash não suportado: {algorithm}")
+
+
+def format_digest(algorithm, hexdigest):
+    """Formata um digest com o algoritmo que o produziu, como gravado nos metadados."""
+    return f"{algorithm}:{hexdigest}"
+
+
+def parse_digest(digest):
+    """
+    Separa um digest gravado nos metadados em (algoritmo, hexdigest).
+    Digests sem prefixo são de versões anteriores, que usavam sempre SHA256.
+    """
+    algorithm, sep, hexdigest = digest.partition(":")
+    if not sep:
+        return "sha256", digest
+    return algorithm, hexdigest
+
+
+def hash_fileobj(fileobj, algorithm=DEFAULT_ALGORITHM, buffer_size=DEFAULT_BUFFER_SIZE):
+    """Calcula o hash do conteúdo de um objeto de arquivo aberto em modo binário."""
+    hasher = new_hasher(algorithm)
+    for chunk in iter(lambda: fileobj.read(buffer_size), b""):
+        hasher.update(chunk)
+    return format_digest(algorithm, hasher.hexdigest())
+
+
+def hash_file(filepath, algorithms, buffer_size=DEFAULT_BUFFER_SIZE, mmap_threshold=DEFAULT_MMAP_THRESHOLD):
+    """
+    Calcula, em uma única leitura do arquivo, o hash para cada algoritmo informado.
+
+    Por padrão o arquivo é lido com `readinto` em blocos de `buffer_size` bytes. Com
+    `mmap_threshold` > 0, arquivos a partir desse tamanho são mapeados em memória e
+    entregues de uma vez aos hashers, o que evita cópias e permite ao BLAKE3
+    paralelizar. O mmap é opcional porque, se o arquivo for truncado por outro
+    processo durante o hash, o acesso às páginas que deixaram de existir encerra o
+    processo com SIGBUS, em vez de gerar uma exceção tratável.
+    Retorna um dicionário {algoritmo: digest formatado}.
+    """
+    with open(filepath, 'rb') as f:
+        size = f.seek(0, 2)
+        f.seek(0)
+        hashers = {algorithm: new_hasher(algorithm, size) for algorithm in algorithms}
+
+        if mmap_threshold and size >= mmap_threshold:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for hasher in hashers.values():
+                    hasher.update(mapped)
+        else:
+            # Buffer limitado ao tamanho do arquivo: zerar 4 MiB a cada arquivo pequeno
+            # custaria mais que o próprio hash
+            buffer = bytearray(max(1, min(buffer_size, size)))
+            view = memoryview(buffer)
+            while True:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                for hasher in hashers.values():
+                    hasher.update(view[:read])
+
+    return {algorithm: format_digest(algorithm, hasher.hexdigest()) for algorithm, hasher in hashers.items()}
@@ -3,17 +3,76 @@
 import sys
 import os
 import json
+import shutil
 from datetime import datetime, timedelta
 
+from status_store import StatusStore
+
 CONFIG_FILE = os.getenv("BACKUP_CONFIG", "config_avancada.json")
 
+OK, WARNING, CRITICAL, UNKNOWN = 0, 1, 2, 3
+SEVERITY_LABELS = {OK: "OK", WARNING: "WARNING", CRITICAL: "CRITICAL", UNKNOWN: "UNKNOWN"}
+
+
+def evaluate_status(config, status, backup_dir, now=None):
+    """Avalia o status do sistema e retorna uma lista de problemas (severidade, mensagem)."""
+    now = now or datetime.now()
+    problems = []
+    schedule = config.get("backup_schedule", {})
+    monitoring = config.get("monitoring", {})
+
+    # Verificar o último backup completo
+    last_full_ts = status.get('last_full_backup_ts')
+    if not last_full_ts:
+        problems.append((WARNING, "Nenhum backup completo foi executado ainda."))
+    else:
+        full_backup_interval_days = schedule.get("full_backup_interval_days", 7)
+        if now - datetime.fromisoformat(last_full_ts) > timedelta(days=full_backup_interval_days * 1.1): # 10% de tolerância
+            problems.append((CRITICAL, f"O último backup completo foi há mais de {full_backup_interval_days} dias."))
+
+    # Verificar o resultado da última execução
+    last_result = status.get('last_result')
+    if last_result and not last_result.get('ok'):
+        problems.append((CRITICAL, f"A última execução ({last_result.get('action')}) falhou: {last_result.get('message')}"))
+
+    # Verificar o atraso dos uploads em relação ao último backup
+    # (o status legado, montado a partir dos metadados, não tem informações de upload)
+    if config.get("cloud_provider") not in (None, "", "none") and "updated_at" in status:
+        last_backup_ts = max(filter(None, [last_full_ts, status.get('last_incremental_backup_ts')]), default=None)
+        last_upload_ts = status.get('last_successful_upload_ts')
+        max_lag = timedelta(hours=monitoring.get("max_upload_lag_hours", 6))
+        if last_backup_ts and (not last_upload_ts or last_upload_ts < last_backup_ts):
+            lag = now - datetime.fromisoformat(last_backup_ts)
+            if lag > max_lag:
+                problems.append((WARNING, f"O último backup ainda não foi enviado para a nuvem após {lag.total_seconds() / 3600:.1f} horas "
+                                          f"({status.get('pending_uploads', 0)} upload(s) pendente(s))."))
+
+    failed_uploads = status.get('failed_uploads', [])
+    if failed_uploads:
+        problems.append((WARNING, f"{len(failed_uploads)} volume(s) com upload falho aguardando nova tentativa."))
+
+    # Verificar o espaço livre no disco de backup
+    disk_min_gb = monitoring.get("system_thresholds", {}).get("disk_min_gb", 10)
+    free_gb = shutil.disk_usage(backup_dir).free / 1024 ** 3
+    if free_gb < disk_min_gb:
+        problems.append((CRITICAL, f"Espaço livre no disco de backup abaixo do mínimo: {free_gb:.1f} GB (mínimo {disk_min_gb} GB)."))
+
+    return problems
+
+
 def check_backup_system():
-    """Verifica a saúde do sistema de backup com base nos metadados."""
+    """
+    Verifica a saúde do sistema de backup com base no arquivo de status.
+
+    Lê apenas o backup_status.json, mantido pelo BackupManager, em vez do
+    backup_metadata.json completo, para que a verificação seja barata mesmo com
+    milhões de arquivos no histórico de hashes.
+    """
     try:
         # Carregar a configuração para encontrar o diretório de backup
         if not os.path.exists(CONFIG_FILE):
             print(f"CRITICAL: Arquivo de configuração '{CONFIG_FILE}' não encontrado.")
-            return 2
+            return CRITICAL
 
         with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
             config = json.load(f)
@@ -21,34 +80,25 @@ def check_backup_system():
         backup_dir = config.get("local_backup_directory")
         if not backup_dir or not os.path.isdir(backup_dir):
             print(f"WARNING: Diretório de backup não configurado ou não encontrado.")
-            return 1
-
-        metadata_file = os.path.join(backup_dir, 'backup_metadata.json')
-        if not os.path.exists(metadata_file):
-            print("CRITICAL: Arquivo de metadados (backup_metadata.json) não encontrado.")
-            return 2
-
-        with open(metadata_file, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
+            return WARNING
 
-        # Verificar o último backup completo
-        last_full_ts = metadata.get('last_full_backup_ts')
-        if not last_full_ts:
-            print("WARNING: Nenhum backup completo foi executado ainda.")
-            return 1
+        status = StatusStore(backup_dir).load()
+        if status is None:
+            print("CRITICAL: Arquivo de status (backup_status.json) e de metadados (backup_metadata.json) não encontrados.")
+            return CRITICAL
 
-        full_backup_interval_days = config.get("backup_schedule", {}).get("full_backup_interval_days", 7)
-        last_full_date = datetime.fromisoformat(last_full_ts)
-        if datetime.now() - last_full_date > timedelta(days=full_backup_interval_days * 1.1): # 10% de tolerância
-            print(f"CRITICAL: O último backup completo foi há mais de {full_backup_interval_days} dias.")
-            return 2
+        problems = evaluate_status(config, status, backup_dir)
+        if not problems:
+            print("OK: Sistema de backup parece saudável.")
+            return OK
 
-        print("OK: Sistema de backup parece saudável.")
-        return 0
+        severity = max(code for code, _ in problems)
+        print(f"{SEVERITY_LABELS[severity]}: " + " ".join(message for _, message in problems))
+        return severity
 
     except Exception as e:
         print(f"UNKNOWN: Ocorreu um erro inesperado durante a verificação: {e}")
-        return 3
+        return UNKNOWN
 
 if __name__ == "__main__":
     exit_code = check_backup_system()
@@ -6,7 +6,9 @@ import time
 from config import BackupConfig
 from backup_manager import BackupManager
 from cloud_sync import CloudSyncManager
+from metrics import start_metrics_server
 from scheduler import BackupScheduler
+from verifier import BackupVerifier
 
 
 def main():
@@ -14,10 +16,12 @@ def main():
     parser = argparse.ArgumentParser(description='Sistema de Backup')
     parser.add_argument('--config', default='config_avancada.json',
                         help='Arquivo de configuração')
-    parser.add_argument('--action', choices=['full', 'incremental', 'schedule', 'cleanup'],
+    parser.add_argument('--action', choices=['full', 'incremental', 'schedule', 'cleanup', 'verify'],
                         default='schedule', help='Ação a executar')
     parser.add_argument('--daemon', action='store_true',
                         help='Executar como daemon')
+    parser.add_argument('--sample', action='store_true',
+                        help='Na verificação, checar apenas a amostra do dia')
 
     args = parser.parse_args()
 
@@ -32,21 +36,32 @@ def main():
     backup_manager = BackupManager(config)
     cloud_sync_manager = CloudSyncManager(config)
 
+    # Remove volumes parciais e backups não concluídos deixados por uma queda anterior
+    backup_manager.recover_incomplete_backups()
+
     try:
         if args.action == 'full':
-            backup_path = backup_manager.perform_full_backup()
-            if backup_path and cloud_sync_manager:
-                cloud_sync_manager.sync_to_cloud(backup_path)
+            cloud_sync_manager.run_backup(backup_manager, backup_manager.perform_full_backup)
 
         elif args.action == 'incremental':
-            backup_path = backup_manager.perform_incremental_backup()
-            if backup_path and cloud_sync_manager:
-                cloud_sync_manager.sync_to_cloud(backup_path)
+            cloud_sync_manager.run_backup(backup_manager, backup_manager.perform_incremental_backup)
 
         elif args.action == 'cleanup':
-            backup_manager.cleanup_old_backups()
+            cloud_sync_manager.run_cleanup(backup_manager)
+
+        elif args.action == 'verify':
+            results = BackupVerifier(config, backup_manager).verify_all(sample=args.sample)
+            if not all(r['ok'] for r in results):
+                return 1
 
         elif args.action == 'schedule':
+            monitoring = config.get('monitoring', {})
+            if monitoring.get('metrics_enabled', True):
+                try:
+                    start_metrics_server(monitoring.get('metrics_host', '127.0.0.1'), monitoring.get('metrics_port', 9108))
+                except OSError as e:
+                    logging.error(f"Não foi possível iniciar o endpoint de métricas: {e}")
+
             scheduler = BackupScheduler(config, backup_manager, cloud_sync_manager)
             scheduler.start()
 
@@ -80,6 +95,9 @@ def main():
     except Exception as e:
         logging.error(f"Erro durante execução: {e}", exc_info=True)
         return 1
+    finally:
+        # Fecha a sessão HTTP e o event loop do provedor, se ele chegou a ser criado
+        cloud_sync_manager.close()
 
     return 0
 
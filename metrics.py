@@ -0,0 +1,156 @@
+# metrics.py
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+# Descrição e tipo de cada métrica exposta no formato do Prometheus
+METRIC_DEFINITIONS = {
+    "backup_stage_seconds_total": ("counter", "Tempo acumulado gasto em cada etapa do backup."),
+    "backup_stage_files_total": ("counter", "Arquivos processados em cada etapa do backup."),
+    "backup_stage_bytes_total": ("counter", "Bytes processados em cada etapa do backup."),
+    "backup_job_runs_total": ("counter", "Execuções de tarefas agendadas, por resultado."),
+    "backup_job_duration_seconds": ("gauge", "Duração da última execução de cada tarefa agendada."),
+    "backup_job_last_run_timestamp_seconds": ("gauge", "Horário (epoch) da última execução de cada tarefa agendada."),
+    "backup_job_next_run_timestamp_seconds": ("gauge", "Horário (epoch) da próxima execução de cada tarefa agendada."),
+}
+
+
+class MetricsRegistry:
+    """Registro thread-safe de contadores e medidores, rotulados, do processo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = value
+
+    def render_prometheus(self):
+        """Retorna as métricas no formato de texto do Prometheus."""
+        with self._lock:
+            values = sorted(self._values.items())
+
+        lines = []
+        current_name = None
+        for (name, labels), value in values:
+            if name != current_name:
+                metric_type, help_text = METRIC_DEFINITIONS.get(name, ("untyped", ""))
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                current_name = name
+            label_str = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class StageTimer:
+    """
+    Mede o tempo e os arquivos/bytes de cada etapa (scan, stat, hash, compress,
+    write, upload, cleanup) de uma execução.
+
+    Os valores ficam disponíveis para o histórico da execução (`as_dict`) e são
+    acumulados também no registro global exposto em /metrics.
+    """
+
+    def __init__(self, registry=REGISTRY):
+        self.registry = registry
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def _stage_entry(self, stage):
+        return self._stages.setdefault(stage, {"seconds": 0.0, "files": 0, "bytes": 0})
+
+    def add_time(self, stage, seconds):
+        with self._lock:
+            self._stage_entry(stage)["seconds"] += seconds
+        self.registry.inc("backup_stage_seconds_total", seconds, stage=stage)
+
+    def count(self, stage, files=0, nbytes=0):
+        with self._lock:
+            entry = self._stage_entry(stage)
+            entry["files"] += files
+            entry["bytes"] += nbytes
+        if files:
+            self.registry.inc("backup_stage_files_total", files, stage=stage)
+        if nbytes:
+            self.registry.inc("backup_stage_bytes_total", nbytes, stage=stage)
+
+    def seconds(self, stage):
+        with self._lock:
+            return self._stages.get(stage, {}).get("seconds", 0.0)
+
+    @contextmanager
+    def stage(self, stage):
+        """Context manager que soma o tempo decorrido à etapa informada."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def as_dict(self):
+        with self._lock:
+            return {stage: {**values, "seconds": round(values["seconds"], 3)} for stage, values in self._stages.items()}
+
+
+class TimedWriter:
+    """Envolve um arquivo e contabiliza o tempo e os bytes de `write` em uma etapa do StageTimer."""
+
+    def __init__(self, fileobj, timer, stage):
+        self._fileobj = fileobj
+        self._timer = timer
+        self._stage = stage
+
+    def write(self, data):
+        start = time.perf_counter()
+        written = self._fileobj.write(data)
+        self._timer.add_time(self._stage, time.perf_counter() - start)
+        self._timer.count(self._stage, nbytes=len(data))
+        return written
+
+    def __getattr__(self, name):
+        return getattr(self._fileobj, name)
+
+
+def _make_handler(registry):
+    """Cria o handler HTTP do /metrics (o http.server só é importado quando o endpoint é iniciado)."""
+    from http.server import BaseHTTPRequestHandler
+
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logging.getLogger(__name__).debug(format % args)
+
+    return _MetricsHandler
+
+
+def start_metrics_server(host="127.0.0.1", port=9108, registry=REGISTRY):
+    """Inicia o endpoint HTTP /metrics em uma thread de segundo plano e retorna o servidor."""
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, port), _make_handler(registry))
+    thread = threading.Thread(target=server.serve_forever, daemon=True, name="metrics-server")
+    thread.start()
+    logging.getLogger(__name__).info(f"Endpoint de métricas disponível em http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,88 @@
+# retention.py
+from bisect import bisect_left, bisect_right
+
+
+class BackupHistoryIndex:
+    """
+    Índice em memória do histórico de backups, ordenado por timestamp.
+
+    O histórico é modelado como cadeias: cada backup completo seguido dos
+    incrementais que dependem dele. Como o histórico é mantido em ordem
+    cronológica, cada cadeia é um trecho contíguo da lista, e as decisões de
+    retenção são buscas binárias sobre as posições dos backups completos, sem
+    percorrer nem reordenar o histórico inteiro.
+    """
+
+    def __init__(self, history):
+        # Ordena apenas uma vez, na construção, se o histórico estiver fora de ordem
+        if any(history[i]['timestamp'] > history[i + 1]['timestamp'] for i in range(len(history) - 1)):
+            history.sort(key=lambda b: b['timestamp'])
+        self.history = history
+        self._rebuild()
+
+    def _rebuild(self):
+        self._timestamps = [b['timestamp'] for b in self.history]
+        self._full_positions = [i for i, b in enumerate(self.history) if b['type'] == 'full']
+
+    def append(self, backup):
+        """Adiciona um backup ao histórico (O(1) para backups em ordem cronológica)."""
+        if self._timestamps and backup['timestamp'] < self._timestamps[-1]:
+            self.history.append(backup)
+            self.history.sort(key=lambda b: b['timestamp'])
+            self._rebuild()
+            return
+        if backup['type'] == 'full':
+            self._full_positions.append(len(self.history))
+        self.history.append(backup)
+        self._timestamps.append(backup['timestamp'])
+
+    def chain_start(self, position):
+        """Posição do backup completo do qual o backup em `position` depende, ou None."""
+        i = bisect_right(self._full_positions, position) - 1
+        return self._full_positions[i] if i >= 0 else None
+
+    def chain_end(self, start):
+        """Posição seguinte ao último incremental da cadeia iniciada em `start`."""
+        i = bisect_right(self._full_positions, start)
+        return self._full_positions[i] if i < len(self._full_positions) else len(self.history)
+
+    def retention_boundary(self, keep_full):
+        """
+        Posição do primeiro backup a manter: o início da `keep_full`-ésima cadeia mais
+        recente. Tudo antes dela são cadeias inteiras (ou incrementais sem base) a remover.
+        """
+        fulls = self._full_positions
+        if not fulls:
+            return 0
+        return fulls[-keep_full] if len(fulls) >= keep_full else fulls[0]
+
+    def expired_chain_prefixes(self, cutoff_ts, min_incrementals=1):
+        """
+        Para cada cadeia com ao menos `min_incrementals` incrementais anteriores a
+        `cutoff_ts`, retorna o intervalo (início, fim) formado pelo backup completo e
+        por esses incrementais expirados.
+        """
+        cutoff_pos = bisect_left(self._timestamps, cutoff_ts)
+        prefixes = []
+        for start in self._full_positions:
+            if start >= cutoff_pos:
+                break
+            end = min(self.chain_end(start), cutoff_pos)
+            if end - start - 1 >= min_incrementals:
+                prefixes.append((start, end))
+        return prefixes
+
+    def remove_prefix(self, count):
+        """Remove os `count` backups mais antigos do histórico e os retorna."""
+        removed = self.history[:count]
+        if count:
+            del self.history[:count]
+            self._rebuild()
+        return removed
+
+    def replace_range(self, start, end, backup):
+        """Substitui os backups em [start, end) por um único backup e retorna os substituídos."""
+        replaced = self.history[start:end]
+        self.history[start:end] = [backup]
+        self._rebuild()
+        return replaced
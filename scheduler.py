@@ -4,6 +4,43 @@ import logging
 import threading
 from datetime import datetime, timedelta
 
+from cron import BlackoutWindow, CronExpression, defer_past_blackouts
+from metrics import REGISTRY
+from verifier import BackupVerifier
+
+# Espera máxima entre reavaliações, mesmo sem tarefas vencidas: protege contra ajustes
+# no relógio do sistema (a espera do threading.Event usa o relógio monotônico)
+MAX_SLEEP_SECONDS = 3600
+# Nova tentativa de uma tarefa que falhou, se o próximo horário regular estiver mais distante
+FAILED_RETRY_DELAY = timedelta(minutes=15)
+
+
+class ScheduledJob:
+    """Tarefa agendada por intervalo fixo ou por expressão cron."""
+
+    def __init__(self, name, func, interval, cron=None, condition=None, last_run_hint=None, run_first_immediately=False):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.cron = CronExpression(cron) if cron else None
+        # Pré-condição verificada no momento da execução (ex.: incremental exige um completo)
+        self.condition = condition
+        # Retorna a última execução registrada nos próprios metadados do backup, se houver
+        self.last_run_hint = last_run_hint
+        # Se nunca executou, roda já, sem esperar pela expressão cron
+        self.run_first_immediately = run_first_immediately
+        self.last_run = None
+        self.next_run = None
+
+    def following(self, reference):
+        """Próxima execução após `reference`, que é a última execução (ou None, se nunca executou)."""
+        if not reference and self.run_first_immediately:
+            return datetime.now()
+        if self.cron:
+            return self.cron.next_after(reference or datetime.now())
+        return reference + self.interval if reference else datetime.now()
+
+
 class BackupScheduler:
     """Gerencia a execução de tarefas de backup de forma assíncrona e baseada em estado."""
 
@@ -11,67 +48,194 @@ class BackupScheduler:
         self.config = config
         self.backup_manager = backup_manager
         self.cloud_sync_manager = cloud_sync_manager
+        self.verifier = BackupVerifier(config, backup_manager)
         self.logger = logging.getLogger(__name__)
         
+        # Valida a configuração já na criação: expressões ou janelas inválidas são erros de configuração.
+        # Calcular a primeira execução de cada tarefa também revela expressões cron que nunca
+        # ocorrem e janelas de bloqueio que cobrem o dia todo (ValueError), que de outra forma
+        # só apareceriam na thread do agendador.
+        self.blackout_windows = [BlackoutWindow(w) for w in self.config.backup_schedule.get('blackout_windows', [])]
+        self.jobs = self._build_jobs()
+        self._load_jobs(datetime.now())
+
         self._stop_event = threading.Event()
         self._thread = None
 
     def _run_task(self, task_func, task_name):
-        """Executa uma tarefa e lida com exceções."""
+        """Executa uma tarefa, lida com exceções e registra suas métricas. Retorna True em caso de sucesso."""
+        start = time.perf_counter()
+        result = "success"
         try:
             self.logger.info(f"Iniciando tarefa agendada: {task_name}")
             task_func()
             self.logger.info(f"Tarefa agendada '{task_name}' concluída com sucesso.")
         except Exception as e:
+            result = "error"
             self.logger.error(f"Erro ao executar a tarefa agendada '{task_name}': {e}", exc_info=True)
+        finally:
+            REGISTRY.inc("backup_job_runs_total", job=task_name, result=result)
+            REGISTRY.set("backup_job_duration_seconds", round(time.perf_counter() - start, 3), job=task_name)
+            REGISTRY.set("backup_job_last_run_timestamp_seconds", int(time.time()), job=task_name)
+        return result == "success"
+
+    def _run_with_uploads(self, func):
+        """
+        Executa uma operação que gera volumes, enviando cada um para a nuvem assim que
+        é concluído (veja `CloudSyncManager.run_backup`).
+
+        Levanta RuntimeError se a operação registrar um resultado de falha, para que a
+        tarefa seja contada como falha e tentada de novo. Uploads que falham não
+        invalidam o backup local: ficam pendentes e são reenviados na próxima execução.
+        """
+        previous_result = self.backup_manager.last_result
+        if self.cloud_sync_manager:
+            result = self.cloud_sync_manager.run_backup(self.backup_manager, func)
+        else:
+            result = func()
+        self._raise_on_failed_result(previous_result)
+        return result
+
+    def _run_cleanup(self):
+        """Aplica a retenção local e, se houver provedor de nuvem, a remota."""
+        previous_result = self.backup_manager.last_result
+        if self.cloud_sync_manager:
+            self.cloud_sync_manager.run_cleanup(self.backup_manager)
+        else:
+            self.backup_manager.cleanup_old_backups()
+        self._raise_on_failed_result(previous_result)
+
+    def _raise_on_failed_result(self, previous_result):
+        outcome = self.backup_manager.last_result
+        if outcome is not previous_result and not outcome["ok"]:
+            raise RuntimeError(f"A operação '{outcome['action']}' falhou: {outcome['message']}")
+
+    def _build_jobs(self):
+        """Cria as tarefas a partir da configuração (`backup_schedule` e `verification`)."""
+        schedule_config = self.config.backup_schedule
+        verify_config = self.config.get("verification", {})
+
+        def last_full_backup():
+            ts = self.backup_manager.metadata.get("last_full_backup_ts")
+            return datetime.fromisoformat(ts) if ts else None
+
+        def last_backup():
+            history = self.backup_manager.metadata.get("backup_history", [])
+            return datetime.fromisoformat(history[-1]["timestamp"]) if history else None
+
+        jobs = [
+            ScheduledJob(
+                "full_backup",
+                lambda: self._run_with_uploads(self.backup_manager.perform_full_backup),
+                timedelta(days=schedule_config.get('full_backup_interval_days', 7)),
+                cron=schedule_config.get('full_backup_cron'),
+                last_run_hint=last_full_backup,
+                run_first_immediately=True,
+            ),
+            ScheduledJob(
+                "incremental_backup",
+                lambda: self._run_with_uploads(self.backup_manager.perform_incremental_backup),
+                timedelta(hours=schedule_config.get('incremental_interval_hours', 24)),
+                cron=schedule_config.get('incremental_cron'),
+                # Só roda se já houver um completo
+                condition=lambda: bool(self.backup_manager.metadata.get("last_full_backup_ts")),
+                last_run_hint=last_backup,
+            ),
+            ScheduledJob(
+                "cleanup",
+                self._run_cleanup,
+                timedelta(days=schedule_config.get('cleanup_interval_days', 1)),
+                cron=schedule_config.get('cleanup_cron'),
+            ),
+        ]
+        if verify_config.get('enabled', True):
+            jobs.append(ScheduledJob(
+                "verify",
+                lambda: self.verifier.verify_all(sample=True),
+                timedelta(hours=verify_config.get('interval_hours', 24)),
+                cron=schedule_config.get('verify_cron'),
+            ))
+        return jobs
+
+    def _plan_next_run(self, job, reference, now):
+        """
+        Calcula a próxima execução de uma tarefa. Execuções perdidas enquanto o processo
+        estava parado são feitas uma única vez, agora; o horário resultante é adiado
+        para fora das janelas de bloqueio.
+        """
+        return defer_past_blackouts(max(job.following(reference), now), self.blackout_windows)
+
+    def _load_jobs(self, now):
+        """Restaura a última execução de cada tarefa e calcula as próximas execuções."""
+        state = self.backup_manager.schedule_state
+        for job in self.jobs:
+            saved = state.get(job.name, {}).get("last_run")
+            candidates = [datetime.fromisoformat(saved)] if saved else []
+            # Os metadados do backup são mais recentes se o processo parou antes de gravar o estado
+            hint = job.last_run_hint() if job.last_run_hint else None
+            if hint:
+                candidates.append(hint)
+            job.last_run = max(candidates, default=None)
+            job.next_run = self._plan_next_run(job, job.last_run, now)
+
+    def _save_jobs(self):
+        """Grava a última e a próxima execução de cada tarefa nos metadados."""
+        state = {}
+        for job in self.jobs:
+            state[job.name] = {
+                "last_run": job.last_run.isoformat() if job.last_run else None,
+                "next_run": job.next_run.isoformat(),
+            }
+            REGISTRY.set("backup_job_next_run_timestamp_seconds", int(job.next_run.timestamp()), job=job.name)
+        try:
+            self.backup_manager.save_schedule_state(state)
+        except (IOError, TypeError) as e:
+            self.logger.error(f"Erro ao gravar o estado do agendador: {e}")
+
+    def _run_due_jobs(self, now):
+        """Executa, na ordem dos horários, as tarefas cujo horário já chegou."""
+        for job in sorted((j for j in self.jobs if j.next_run <= now), key=lambda j: j.next_run):
+            if self._stop_event.is_set():
+                break
+            if job.condition and not job.condition():
+                self.logger.info(f"Tarefa '{job.name}' adiada: pré-condição não atendida.")
+                job.next_run = self._plan_next_run(job, datetime.now(), datetime.now())
+                continue
+
+            self.logger.info(f"Disparando tarefa agendada '{job.name}' (prevista para {job.next_run:%Y-%m-%d %H:%M}).")
+            started = datetime.now()
+            succeeded = self._run_task(job.func, job.name)
+            finished = datetime.now()
+            if succeeded:
+                job.last_run = started
+                # Intervalos contam a partir do início da execução; o cron, a partir do fim,
+                # para que uma execução longa não dispare logo em seguida uma ocorrência perdida
+                job.next_run = self._plan_next_run(job, finished if job.cron else started, finished)
+            else:
+                # Nova tentativa após um intervalo, ou no próximo horário regular, se vier antes
+                retry = min(finished + FAILED_RETRY_DELAY, job.following(finished))
+                job.next_run = defer_past_blackouts(retry, self.blackout_windows)
+            self.logger.info(f"Próxima execução de '{job.name}': {job.next_run:%Y-%m-%d %H:%M}.")
+        self._save_jobs()
 
     def _schedule_runner(self):
-        """Loop principal que verifica e executa tarefas pendentes."""
+        """
+        Loop principal: dorme até o horário da próxima tarefa, executa as tarefas
+        vencidas e recalcula os horários.
+        """
         self.logger.info("O loop do agendador foi iniciado.")
-        
-        # Dicionário para rastrear a última execução de cada tarefa
-        last_run = {
-            "full_backup": None,
-            "incremental_backup": None,
-            "cleanup": None
-        }
+        self._save_jobs()
+        for job in self.jobs:
+            self.logger.info(f"Próxima execução de '{job.name}': {job.next_run:%Y-%m-%d %H:%M}.")
 
         while not self._stop_event.is_set():
             now = datetime.now()
-            schedule_config = self.config.backup_schedule
-
-            # 1. Verificar se é hora de um backup completo
-            full_interval = timedelta(days=schedule_config.get('full_backup_interval_days', 7))
-            last_full_ts = self.backup_manager.metadata.get("last_full_backup_ts")
-            last_full_time = datetime.fromisoformat(last_full_ts) if last_full_ts else None
-
-            if not last_full_time or (now - last_full_time) >= full_interval:
-                self.logger.info("Disparando backup completo devido ao intervalo agendado.")
-                backup_path = self.backup_manager.perform_full_backup()
-                if backup_path and self.cloud_sync_manager:
-                    self.cloud_sync_manager.sync_to_cloud(backup_path)
-                # Atualiza o timestamp da última execução, mesmo que o backup não tenha gerado arquivos
-                last_run["full_backup"] = now
-
-            # 2. Verificar se é hora de um backup incremental
-            inc_interval = timedelta(hours=schedule_config.get('incremental_interval_hours', 24))
-            if last_run["incremental_backup"] is None or (now - last_run["incremental_backup"]) >= inc_interval:
-                if self.backup_manager.metadata.get("last_full_backup_ts"): # Só roda se já houver um completo
-                    self.logger.info("Disparando backup incremental devido ao intervalo agendado.")
-                    backup_path = self.backup_manager.perform_incremental_backup()
-                    if backup_path and self.cloud_sync_manager:
-                        self.cloud_sync_manager.sync_to_cloud(backup_path)
-                    last_run["incremental_backup"] = now
-
-            # 3. Verificar se é hora da limpeza
-            cleanup_interval = timedelta(days=1) # Roda a limpeza uma vez por dia
-            if last_run["cleanup"] is None or (now - last_run["cleanup"]) >= cleanup_interval:
-                self.logger.info("Disparando limpeza de backups antigos.")
-                self.backup_manager.cleanup_old_backups()
-                last_run["cleanup"] = now
-
-            # Espera por 60 segundos antes da próxima verificação
-            self._stop_event.wait(60)
+            if any(job.next_run <= now for job in self.jobs):
+                self._run_due_jobs(now)
+                continue
+
+            earliest = min(job.next_run for job in self.jobs)
+            self._stop_event.wait(min((earliest - now).total_seconds(), MAX_SLEEP_SECONDS))
 
         self.logger.info("O loop do agendador foi encerrado.")
 
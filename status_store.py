@@ -0,0 +1,122 @@
+# status_store.py
+import os
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from fileutils import atomic_write_json
+
+STATUS_FILENAME = 'backup_status.json'
+METADATA_FILENAME = 'backup_metadata.json'
+
+# Campos que também podem ser obtidos do backup_metadata.json
+METADATA_FIELDS = ("last_full_backup_ts", "last_incremental_backup_ts", "total_backups")
+
+# Serializa as atualizações feitas por threads do mesmo processo (backup, uploads, agendador)
+_update_lock = threading.Lock()
+
+
+def _process_alive(pid):
+    """Indica se o processo ainda existe (no Windows não há como checar sem encerrá-lo; assume que sim)."""
+    if pid == os.getpid() or os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def load_legacy_status(backup_dir):
+    """
+    Monta um status mínimo a partir do backup_metadata.json, para instalações em que
+    o arquivo de status ainda não foi gerado (nenhum backup desde a atualização).
+    Retorna None se os metadados também não existirem.
+    """
+    metadata_file = Path(backup_dir) / METADATA_FILENAME
+    try:
+        with metadata_file.open('r', encoding='utf-8') as f:
+            metadata = json.load(f)
+    except FileNotFoundError:
+        return None
+    history = metadata.get('backup_history', [])
+    incrementals = [b['timestamp'] for b in history if b.get('type') == 'incremental']
+    return {
+        "last_full_backup_ts": metadata.get('last_full_backup_ts'),
+        "last_incremental_backup_ts": max(incrementals, default=None),
+        "total_backups": len(history)
+    }
+
+
+class StatusStore:
+    """
+    Registro pequeno do estado do sistema de backup, mantido ao lado dos metadados.
+
+    Guarda apenas os campos consultados pelo monitoramento (últimos backups,
+    último resultado, estado dos uploads e do agendador), para que `health_check.py` e
+    `cli.py status` não precisem carregar o `backup_metadata.json` inteiro.
+    """
+
+    def __init__(self, backup_directory):
+        self.backup_directory = Path(backup_directory)
+        self.path = self.backup_directory / STATUS_FILENAME
+
+    def read(self):
+        """Retorna o status gravado, ou None se ainda não existir ou estiver ilegível."""
+        try:
+            with self.path.open('r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def load(self):
+        """
+        Retorna o status gravado, completando a partir dos metadados os campos que ainda
+        não foram registrados, ou None se nem o status nem os metadados existirem.
+        """
+        return self._with_metadata_fields(self.read())
+
+    def _with_metadata_fields(self, status):
+        """Preenche os campos de `METADATA_FIELDS` ausentes em `status` com os valores dos metadados."""
+        if status is not None and all(field in status for field in METADATA_FIELDS):
+            return status
+        legacy = load_legacy_status(self.backup_directory)
+        if legacy is None:
+            return status
+        return {**legacy, **(status or {})}
+
+    def update(self, pending_uploads_delta=0, failed_uploads_add=(), failed_uploads_remove=(), **fields):
+        """
+        Atualiza os campos informados, preservando os demais. `pending_uploads_delta`
+        é somado ao tamanho da fila de uploads deste processo; `failed_uploads_add` e
+        `failed_uploads_remove` incluem e retiram caminhos da lista `failed_uploads`,
+        os volumes cujo upload falhou e que aguardam uma nova tentativa.
+
+        Cada processo tem a sua fila em `upload_queues` (por PID), e `pending_uploads`
+        é a soma das filas de processos vivos: os uploads de um processo que caiu
+        deixam de contar na próxima atualização, em vez de ficarem pendentes para sempre.
+
+        Quem cria o arquivo nem sempre é um backup (pode ser um upload ou o agendador):
+        os campos que ainda faltam são obtidos dos metadados, para que o monitoramento
+        não dependa de qual processo gravou primeiro.
+        """
+        with _update_lock:
+            current = self._with_metadata_fields(self.read()) or {}
+            current.update(fields)
+            if pending_uploads_delta or "upload_queues" in current:
+                queues = current.get("upload_queues", {})
+                if pending_uploads_delta:
+                    pid = str(os.getpid())
+                    queues[pid] = max(0, queues.get(pid, 0) + pending_uploads_delta)
+                current["upload_queues"] = {pid: n for pid, n in queues.items() if n and _process_alive(int(pid))}
+                current["pending_uploads"] = sum(current["upload_queues"].values())
+            if failed_uploads_add or failed_uploads_remove:
+                failed = [p for p in current.get("failed_uploads", []) if p not in set(failed_uploads_remove)]
+                failed += [p for p in failed_uploads_add if p not in failed]
+                current["failed_uploads"] = failed
+            current["updated_at"] = datetime.now().isoformat()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_json(self.path, current, indent=4, default=str)
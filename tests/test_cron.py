@@ -0,0 +1,91 @@
+# tests/test_cron.py
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cron import BlackoutWindow, CronExpression, defer_past_blackouts
+
+# 01/01/2024 foi uma segunda-feira
+
+
+@pytest.mark.parametrize("expression, moment, expected", [
+    ("*/15 * * * *", datetime(2024, 1, 1, 10, 7, 30), datetime(2024, 1, 1, 10, 15)),
+    # Estritamente posterior: a ocorrência no próprio instante não conta
+    ("30 2 * * *", datetime(2024, 1, 1, 2, 30), datetime(2024, 1, 2, 2, 30)),
+    ("0 0 1 * *", datetime(2024, 1, 31, 12, 0), datetime(2024, 2, 1, 0, 0)),
+    ("0 8-18/2 * * mon-fri", datetime(2024, 1, 5, 18, 30), datetime(2024, 1, 8, 8, 0)),
+    ("0 0 29 feb *", datetime(2024, 3, 1), datetime(2028, 2, 29, 0, 0)),
+    # 0 e 7 representam o domingo
+    ("0 0 * * 7", datetime(2024, 1, 1), datetime(2024, 1, 7, 0, 0)),
+    ("0 0 31 dec *", datetime(2024, 12, 31, 23, 59), datetime(2025, 12, 31, 0, 0)),
+])
+def test_next_after(expression, moment, expected):
+    assert CronExpression(expression).next_after(moment) == expected
+
+
+def test_day_of_month_or_day_of_week():
+    # Ambos restritos: basta um deles coincidir
+    cron = CronExpression("0 12 15 * fri")
+    assert cron.next_after(datetime(2024, 1, 1)) == datetime(2024, 1, 5, 12, 0)
+    assert cron.next_after(datetime(2024, 1, 13)) == datetime(2024, 1, 15, 12, 0)
+    # Com o dia do mês livre, vale apenas o dia da semana
+    assert CronExpression("0 12 * * fri").next_after(datetime(2024, 1, 13)) == datetime(2024, 1, 19, 12, 0)
+    assert CronExpression("0 12 */1 * fri").next_after(datetime(2024, 1, 13)) == datetime(2024, 1, 19, 12, 0)
+
+
+@pytest.mark.parametrize("expression", [
+    "0 0 * *",
+    "60 * * * *",
+    "0 0 0 * *",
+    "0 0 5-1 * *",
+    "0 0 * * */0",
+    # Válida, mas nunca ocorre
+    "0 0 30 2 *",
+])
+def test_invalid_expression(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression)
+
+
+def test_blackout_defers_to_window_end():
+    windows = [BlackoutWindow("08:00-18:00")]
+    assert defer_past_blackouts(datetime(2024, 1, 1, 9, 0), windows) == datetime(2024, 1, 1, 18, 0)
+    assert defer_past_blackouts(datetime(2024, 1, 1, 7, 59), windows) == datetime(2024, 1, 1, 7, 59)
+    # O fim da janela já está liberado
+    assert defer_past_blackouts(datetime(2024, 1, 1, 18, 0), windows) == datetime(2024, 1, 1, 18, 0)
+
+
+def test_blackout_weekdays():
+    windows = [BlackoutWindow("mon-fri 08:00-18:00")]
+    assert defer_past_blackouts(datetime(2024, 1, 5, 10, 0), windows) == datetime(2024, 1, 5, 18, 0)
+    assert defer_past_blackouts(datetime(2024, 1, 6, 10, 0), windows) == datetime(2024, 1, 6, 10, 0)
+
+
+def test_blackout_across_midnight():
+    window = BlackoutWindow("fri 22:00-02:00")
+    assert window.end_if_active(datetime(2024, 1, 5, 23, 0)) == datetime(2024, 1, 6, 2, 0)
+    # Os dias se referem ao início da janela: sábado de madrugada ainda é a janela de sexta
+    assert window.end_if_active(datetime(2024, 1, 6, 1, 0)) == datetime(2024, 1, 6, 2, 0)
+    assert window.end_if_active(datetime(2024, 1, 7, 1, 0)) is None
+    assert window.end_if_active(datetime(2024, 1, 5, 21, 59)) is None
+
+
+def test_chained_blackouts():
+    windows = [BlackoutWindow("08:00-12:00"), BlackoutWindow("12:00-14:00"), BlackoutWindow("13:00-15:30")]
+    assert defer_past_blackouts(datetime(2024, 1, 1, 9, 0), windows) == datetime(2024, 1, 1, 15, 30)
+
+
+def test_blackouts_covering_every_hour():
+    windows = [BlackoutWindow("00:00-12:00"), BlackoutWindow("12:00-00:00")]
+    with pytest.raises(ValueError):
+        defer_past_blackouts(datetime(2024, 1, 1, 9, 0), windows)
+
+
+@pytest.mark.parametrize("text", ["08:00-08:00", "8h-18h", "mon fri 08:00-18:00", "xyz 08:00-18:00"])
+def test_invalid_blackout(text):
+    with pytest.raises(ValueError):
+        BlackoutWindow(text)
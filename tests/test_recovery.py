@@ -0,0 +1,111 @@
+# tests/test_recovery.py
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import backup_manager
+import fileutils
+from backup_manager import BackupManager
+from config import BackupConfig
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Configuração com uma pasta de origem pequena e sem provedor de nuvem."""
+    source = tmp_path / "origem"
+    source.mkdir()
+    for i in range(3):
+        (source / f"f{i}.txt").write_text("x" * i * 100)
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({
+        "source_directory": str(source),
+        "local_backup_directory": str(tmp_path / "backups"),
+        "cloud_provider": "none"
+    }))
+    return BackupConfig(str(config_path))
+
+
+def _names(directory):
+    return sorted(p.name for p in Path(directory).iterdir())
+
+
+def _simulate_crash(backup_dir, base_name):
+    """Deixa no diretório o que um backup interrompido após o primeiro volume deixaria."""
+    (backup_dir / "backup_journal.json").write_text(json.dumps({"in_progress": base_name}))
+    (backup_dir / f"{base_name}_vol001.zip").write_bytes(b"volume concluido")
+    (backup_dir / f"{base_name}_vol002.zip.partial").write_bytes(b"volume em andamento")
+    (backup_dir / "backup_metadata.json.tmp").write_text("{")
+
+
+def test_recovery_removes_uncommitted_backup(config):
+    manager = BackupManager(config)
+    committed = manager.perform_full_backup()
+    backup_dir = Path(config.local_backup_directory)
+    before = _names(backup_dir)
+    _simulate_crash(backup_dir, "incremental_backup_20240101_000000")
+
+    BackupManager(config).recover_incomplete_backups()
+
+    assert _names(backup_dir) == before
+    assert Path(committed).exists()
+
+
+def test_recovery_keeps_committed_backup(config):
+    manager = BackupManager(config)
+    committed = manager.perform_full_backup()
+    backup_dir = Path(config.local_backup_directory)
+    # Queda depois de salvar os metadados, mas antes de apagar o journal
+    (backup_dir / "backup_journal.json").write_text(json.dumps({"in_progress": Path(committed).stem}))
+
+    BackupManager(config).recover_incomplete_backups()
+
+    assert Path(committed).exists()
+    assert not (backup_dir / "backup_journal.json").exists()
+
+
+def test_recovery_waits_for_journal_owner(config):
+    fcntl = pytest.importorskip("fcntl")
+    BackupManager(config).perform_full_backup()
+    backup_dir = Path(config.local_backup_directory)
+    _simulate_crash(backup_dir, "incremental_backup_20240101_000000")
+    in_progress = _names(backup_dir)
+
+    # Outro processo dono do journal: nada do backup em andamento pode ser apagado
+    with open(backup_dir / "backup_journal.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        manager = BackupManager(config)
+        manager.recover_incomplete_backups()
+        assert _names(backup_dir) == in_progress
+
+    manager.recover_incomplete_backups()
+    assert "backup_journal.json" not in _names(backup_dir)
+    assert not list(backup_dir.glob("incremental_backup_*"))
+
+
+def test_metadata_save_failure_discards_backup(config, monkeypatch):
+    manager = BackupManager(config)
+    manager.perform_full_backup()
+    backup_dir = Path(config.local_backup_directory)
+    before = _names(backup_dir)
+    (Path(config.source_directory) / "novo.txt").write_text("novo")
+
+    def failing_write(path, *args, **kwargs):
+        if Path(path).name == "backup_metadata.json":
+            raise IOError("disco cheio")
+        return fileutils.atomic_write_json(path, *args, **kwargs)
+
+    monkeypatch.setattr(backup_manager, "atomic_write_json", failing_write)
+    assert manager.perform_incremental_backup() is None
+
+    # Os volumes do backup não registrado são descartados e o histórico segue o do disco
+    assert _names(backup_dir) == before
+    assert len(manager.metadata["backup_history"]) == 1
+    assert manager.status_store.read()["last_result"]["ok"] is False
+
+    monkeypatch.undo()
+    assert manager.perform_incremental_backup()
+    assert len(manager.metadata["backup_history"]) == 2
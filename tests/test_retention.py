@@ -0,0 +1,122 @@
+# tests/test_retention.py
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backup_manager import BackupManager
+from config import BackupConfig
+from retention import BackupHistoryIndex
+from verifier import BackupVerifier
+
+
+def _history(types):
+    """Histórico sintético em ordem cronológica: um backup por dia, a partir de 01/01/2024."""
+    return [{"type": "full" if t == "F" else "incremental", "timestamp": f"2024-01-{i + 1:02d}T00:00:00"}
+            for i, t in enumerate(types)]
+
+
+@pytest.fixture
+def index():
+    """Três cadeias: posições 0-2, 3-4 e 5-8."""
+    return BackupHistoryIndex(_history("FIIFIFIII"))
+
+
+def test_chain_boundaries(index):
+    assert [index.chain_start(p) for p in range(9)] == [0, 0, 0, 3, 3, 5, 5, 5, 5]
+    assert [index.chain_end(s) for s in (0, 3, 5)] == [3, 5, 9]
+
+
+def test_incrementals_without_base():
+    index = BackupHistoryIndex(_history("IIFI"))
+    assert index.chain_start(1) is None
+    assert index.chain_start(3) == 2
+    # Incrementais sem base ficam antes da fronteira e são removidos com as cadeias antigas
+    assert index.retention_boundary(1) == 2
+
+
+def test_retention_boundary(index):
+    assert index.retention_boundary(1) == 5
+    assert index.retention_boundary(2) == 3
+    # Com menos cadeias que o limite, todas são mantidas
+    assert index.retention_boundary(5) == 0
+    assert BackupHistoryIndex(_history("II")).retention_boundary(1) == 0
+
+
+def test_expired_chain_prefixes(index):
+    cutoff = "2024-01-08T00:00:00"  # posição 7
+    assert index.expired_chain_prefixes(cutoff) == [(0, 3), (3, 5), (5, 7)]
+    assert index.expired_chain_prefixes(cutoff, min_incrementals=2) == [(0, 3)]
+    # O corte cai dentro da última cadeia: só os incrementais anteriores a ele expiram
+    assert index.expired_chain_prefixes("2024-01-07T00:00:00") == [(0, 3), (3, 5)]
+    assert index.expired_chain_prefixes("2024-01-01T00:00:00") == []
+
+
+def test_replace_range(index):
+    synthetic = {"type": "full", "synthetic": True, "timestamp": "2024-01-07T00:00:00"}
+    replaced = index.replace_range(5, 7, synthetic)
+
+    assert [b["timestamp"] for b in replaced] == ["2024-01-06T00:00:00", "2024-01-07T00:00:00"]
+    assert len(index.history) == 8
+    assert index.history[5] is synthetic
+    # Os incrementais restantes passam a depender do backup sintético
+    assert index.chain_start(7) == 5
+    assert index.chain_end(5) == 8
+
+
+def test_remove_prefix(index):
+    removed = index.remove_prefix(3)
+
+    assert len(removed) == 3
+    assert [b["type"] for b in index.history] == ["full", "incremental", "full", "incremental", "incremental", "incremental"]
+    assert index.chain_end(0) == 2
+    assert index.remove_prefix(0) == []
+
+
+def test_append_out_of_order():
+    index = BackupHistoryIndex(_history("FIF"))
+    index.append({"type": "incremental", "timestamp": "2024-01-02T12:00:00"})
+
+    assert [b["timestamp"] for b in index.history][2] == "2024-01-02T12:00:00"
+    assert index.chain_end(0) == 3
+    assert index.chain_start(4) == 3
+
+
+def test_consolidation_hashes_members_without_manifest(tmp_path):
+    source = tmp_path / "origem"
+    source.mkdir()
+    (source / "a.txt").write_text("a")
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({
+        "source_directory": str(source),
+        "local_backup_directory": str(tmp_path / "backups"),
+        "cloud_provider": "none",
+        "retention_policy": {"keep_full_backups": 5, "keep_incremental_days": 1,
+                             "consolidate_incrementals": True, "consolidate_min_incrementals": 2}
+    }))
+    config = BackupConfig(str(config_path))
+    manager = BackupManager(config)
+    manager.perform_full_backup()
+    for i in range(3):
+        (source / f"f{i}.txt").write_text(str(i))
+        manager.perform_incremental_backup()
+
+    # Backups antigos, e os dois primeiros de versões anteriores aos manifestos
+    start = datetime.now() - timedelta(days=10)
+    for i, backup in enumerate(manager.metadata["backup_history"]):
+        backup["timestamp"] = (start + timedelta(hours=i)).isoformat()
+        if i < 2:
+            Path(backup.pop("manifest")).unlink()
+    manager._save_metadata()
+
+    manager = BackupManager(config)
+    manager.cleanup_old_backups()
+
+    history = manager.metadata["backup_history"]
+    assert [(b["type"], b.get("synthetic")) for b in history] == [("full", True)]
+    assert set(json.loads(Path(history[0]["manifest"]).read_text())["files"]) == {"a.txt", "f0.txt", "f1.txt", "f2.txt"}
+    assert all(r["ok"] for r in BackupVerifier(config, manager).verify_all())
@@ -0,0 +1,101 @@
+# tests/test_s3_provider.py
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+import cloud_sync
+from cloud_sync import S3_MIN_PART_SIZE, S3Provider, s3_etag
+
+BUCKET = "backups"
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    """S3Provider sobre um bucket simulado pelo moto, com partes do tamanho mínimo do S3."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "teste")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "teste")
+    with moto.mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=BUCKET)
+        config = {
+            "cloud_credentials": {"s3": {"bucket": BUCKET, "region_name": "us-east-1"}},
+            "performance": {"chunk_size_mb": 5, "max_concurrent_parts": 3, "retry_attempts": 1},
+        }
+        yield S3Provider(config)
+
+
+def _count_calls(monkeypatch, client, method):
+    """Substitui um método do cliente por um que conta as chamadas e delega ao original."""
+    calls = []
+    original = getattr(client, method)
+
+    def wrapper(**kwargs):
+        calls.append(kwargs)
+        return original(**kwargs)
+
+    monkeypatch.setattr(client, method, wrapper)
+    return calls
+
+
+def test_multipart_upload(provider, monkeypatch, tmp_path):
+    local_path = tmp_path / "full_backup_20240101_000000.zip"
+    local_path.write_bytes(os.urandom(2 * S3_MIN_PART_SIZE + 1234))
+    part_calls = _count_calls(monkeypatch, provider.client, "upload_part")
+
+    assert provider.upload_file(local_path, "/Backups/full_backup_20240101_000000.zip")
+
+    assert sorted(call["PartNumber"] for call in part_calls) == [1, 2, 3]
+    obj = provider.client.get_object(Bucket=BUCKET, Key="Backups/full_backup_20240101_000000.zip")
+    assert obj["Body"].read() == local_path.read_bytes()
+    # O ETag do objeto multipart é o mesmo calculado localmente
+    assert obj["ETag"].strip('"') == s3_etag(local_path, provider.part_size)
+    assert not provider.client.list_multipart_uploads(Bucket=BUCKET).get("Uploads")
+
+
+def test_failed_multipart_upload_is_aborted(provider, monkeypatch, tmp_path):
+    local_path = tmp_path / "full_backup_20240101_000000.zip"
+    local_path.write_bytes(os.urandom(S3_MIN_PART_SIZE + 1))
+
+    def failing_part(**kwargs):
+        raise RuntimeError("conexão reiniciada")
+
+    monkeypatch.setattr(provider.client, "upload_part", failing_part)
+
+    assert not provider.upload_file(local_path, "/Backups/full_backup_20240101_000000.zip")
+    assert not provider.client.list_multipart_uploads(Bucket=BUCKET).get("Uploads")
+
+
+@pytest.mark.parametrize("size", [1000, 2 * S3_MIN_PART_SIZE + 1])
+def test_upload_skipped_when_etag_matches(provider, monkeypatch, tmp_path, size):
+    local_path = tmp_path / "incremental_backup_20240102_000000.zip"
+    local_path.write_bytes(os.urandom(size))
+    assert provider.upload_file(local_path, "/Backups/incremental_backup_20240102_000000.zip")
+
+    put_calls = _count_calls(monkeypatch, provider.client, "put_object")
+    part_calls = _count_calls(monkeypatch, provider.client, "upload_part")
+    assert provider.upload_file(local_path, "/Backups/incremental_backup_20240102_000000.zip")
+    assert not put_calls and not part_calls
+
+    # Com o conteúdo alterado (mesmo tamanho), o arquivo é enviado de novo
+    local_path.write_bytes(os.urandom(size))
+    assert provider.upload_file(local_path, "/Backups/incremental_backup_20240102_000000.zip")
+    assert put_calls or part_calls
+
+
+def test_delete_files_in_batches(provider, monkeypatch):
+    monkeypatch.setattr(cloud_sync, "S3_DELETE_BATCH_SIZE", 2)
+    names = [f"incremental_backup_2024010{i}_000000.zip" for i in range(1, 6)]
+    for name in names + ["full_backup_20240201_000000.zip"]:
+        provider.client.put_object(Bucket=BUCKET, Key=f"Backups/{name}", Body=b"x")
+    delete_calls = _count_calls(monkeypatch, provider.client, "delete_objects")
+
+    assert provider.delete_files([f"/Backups/{name}" for name in names]) == len(names)
+
+    assert [len(call["Delete"]["Objects"]) for call in delete_calls] == [2, 2, 1]
+    assert [f["name"] for f in provider.list_files("/Backups")] == ["full_backup_20240201_000000.zip"]
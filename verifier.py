@@ -0,0 +1,134 @@
+# verifier.py
+import json
+import random
+import hashlib
+import logging
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+
+from hashing import DEFAULT_ALGORITHM, hash_fileobj, parse_digest
+
+
+class BackupVerifier:
+    """Verifica a integridade dos backups locais comparando-os com seus manifestos."""
+
+    def __init__(self, config, backup_manager):
+        self.config = config
+        self.backup_manager = backup_manager
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def verification_config(self):
+        return self.config.get("verification", {})
+
+    def _in_sample(self, member_key, day_index, rotation_days):
+        """
+        Decide se um membro entra na amostra do dia.
+
+        Cada membro cai de forma pseudoaleatória (mas estável) em um dos `rotation_days`
+        grupos, e a cada dia um grupo diferente é verificado; assim todo o acervo é
+        coberto ao longo da janela de rotação.
+        """
+        bucket = random.Random(hashlib.md5(member_key.encode('utf-8')).digest()).randrange(rotation_days)
+        return bucket == day_index % rotation_days
+
+    def _verify_member(self, read_member, name, expected_hash):
+        """Lê um membro por completo e compara o hash; retorna uma descrição da falha ou None."""
+        # O digest do manifesto informa o algoritmo que o produziu
+        algorithm = parse_digest(expected_hash)[0] if expected_hash is not None else DEFAULT_ALGORITHM
+        try:
+            with read_member(name) as f:
+                digest = hash_fileobj(f, algorithm)
+        except (IOError, zipfile.BadZipFile) as e:
+            # O zipfile valida o CRC32 de cada membro ao final da leitura.
+            return f"{name}: {e}"
+        except (ImportError, ValueError) as e:
+            return f"{name}: não foi possível verificar o hash ({e})"
+        if expected_hash is not None and parse_digest(digest) != parse_digest(expected_hash):
+            return f"{name}: hash divergente do manifesto"
+        return None
+
+    def verify_backup(self, backup, sample=False, day_index=None):
+        """Verifica um backup do histórico e retorna um dicionário com o resultado."""
+        rotation_days = max(1, int(self.verification_config.get("sample_rotation_days", 7)))
+        if day_index is None:
+            day_index = date.today().toordinal()
+
+        expected_hashes = None
+        manifest_path = backup.get("manifest")
+        if manifest_path:
+            try:
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    expected_hashes = json.load(f).get("files", {})
+            except (json.JSONDecodeError, IOError) as e:
+                return {"path": backup["path"], "checked": 0, "failures": [f"Manifesto ilegível: {e}"], "ok": False}
+
+        checked = 0
+        failures = []
+        for volume in backup.get("volumes", [backup["path"]]):
+            volume_path = Path(volume)
+            if not volume_path.exists():
+                failures.append(f"Volume não encontrado: {volume_path}")
+                continue
+
+            try:
+                if volume_path.is_dir():
+                    names = [p.relative_to(volume_path).as_posix() for p in volume_path.rglob('*') if p.is_file()]
+                    archive = None
+                    read_member = lambda name: (volume_path / name).open('rb')
+                else:
+                    archive = zipfile.ZipFile(volume_path)
+                    names = [info.filename for info in archive.infolist() if not info.is_dir()]
+                    read_member = archive.open
+
+                try:
+                    for name in names:
+                        if sample and not self._in_sample(f"{volume_path.name}/{name}", day_index, rotation_days):
+                            continue
+                        expected = expected_hashes.get(name) if expected_hashes is not None else None
+                        if expected_hashes is not None and expected is None:
+                            failures.append(f"{name}: membro ausente do manifesto")
+                            continue
+                        failure = self._verify_member(read_member, name, expected)
+                        checked += 1
+                        if failure:
+                            failures.append(f"{volume_path.name}/{failure}")
+                finally:
+                    if archive is not None:
+                        archive.close()
+            except (IOError, zipfile.BadZipFile) as e:
+                failures.append(f"{volume_path.name}: {e}")
+
+        return {"path": backup["path"], "checked": checked, "failures": failures, "ok": not failures}
+
+    def verify_all(self, sample=False):
+        """
+        Verifica todos os backups do histórico em paralelo (um backup por worker).
+
+        Com `sample=True`, apenas a fração do dia de cada arquivo é relida.
+        """
+        history = self.backup_manager.metadata.get("backup_history", [])
+        if not history:
+            self.logger.info("Nenhum backup para verificar.")
+            return []
+
+        mode = "amostragem" if sample else "completa"
+        self.logger.info(f"Iniciando verificação {mode} de {len(history)} backup(s)...")
+        max_workers = max(1, int(self.verification_config.get("max_workers", 4)))
+        day_index = date.today().toordinal()
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="verify") as executor:
+            results = list(executor.map(lambda b: self.verify_backup(b, sample, day_index), history))
+
+        self.backup_manager.record_verification(results)
+        for result in results:
+            if result["ok"]:
+                self.logger.info(f"Backup íntegro: {result['path']} ({result['checked']} membro(s) verificado(s))")
+            else:
+                for failure in result["failures"]:
+                    self.logger.error(f"Falha de integridade em {result['path']}: {failure}")
+
+        failed = sum(1 for r in results if not r["ok"])
+        self.logger.info(f"Verificação concluída: {len(results) - failed} íntegro(s), {failed} com falha.")
+        return results